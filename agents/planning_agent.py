@@ -1,8 +1,12 @@
 import math
+import os
 import random
-from copy import deepcopy
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 import api.agent_api
+from api.priority_queue import PriorityQueue
 
 
 class PlanningAgent:
@@ -36,41 +40,83 @@ class PlanningAgent:
     SIM_LENGTH = 240
     TICK_HZ = 60
 
+    # The number of states remembered by bfs so that states reached more than once are only searched once. This changes
+    # which states are searched, so plans can differ from those found without it (see check_transposition)
+    TRANSPOSITION_TABLE_SIZE = 100000
+
+    # The number of processes MCTS runs its rollouts on. None uses every core available to the simulation
+    MCTS_WORKERS = None
+    # The most rollouts each MCTS worker performs
+    MCTS_ROLLOUTS = 1000
+
+    # The number of milliseconds the search may run for each tick. None plans to completion before the simulation starts
+    PLANNING_BUDGET = None
+
     def __init__(self, api, world_info):
         self.api = api
         self.thinking = False
         self.world_info = world_info
         self.current_task = world_info["tasks"][list(world_info["tasks"].keys())[0]]["id"]
 
-        self.plan = self.bfs(world_info)
-        print(self.plan)
+        self.transposition_table = OrderedDict()
+        self.transposition_hits = 0
+        self.transposition_misses = 0
+
+        self.pool = None
+
+        self.queue = None
+        self.tie_breaker = None
+        self.best_state = None
+        self.committed = []
+        self.delay = 0
+        self.states_checked = 0
+
+        if self.PLANNING_BUDGET is None:
+            self.plan = self.bfs(world_info)
+            print(self.plan)
+        else:
+            self.start_search(world_info)
+            self.plan = []
 
     def get_next_commands(self):
         self.api : api.agent_api.AgentAPI
         current_tick = self.world_info["tick"]
-        if self.plan:
-            if current_tick == self.plan[0][-1]:
-                current_command = self.plan.pop(0)
-                if current_command[1] == self.MOVE_TO:
-                    self.api.move_to(current_command[0], current_command[2])
-                elif current_command[1] == self.PICK_UP_RESOURCE:
-                    self.api.pick_up_resource(current_command[0], current_command[2])
-                elif current_command[1] == self.DROP_RESOURCE:
-                    self.api.drop_resource(current_command[0], current_command[2])
-                elif current_command[1] == self.DROP_ALL_RESOURCES:
-                    self.api.drop_all_resources(current_command[0])
-                elif current_command[1] == self.DIG_AT:
-                    self.api.dig_at(current_command[0], current_command[2])
-                elif current_command[1] == self.START_SITE:
-                    self.api.start_site(current_command[0], 0, current_command[2])
-                elif current_command[1] == self.CONSTRUCT_AT:
-                    self.api.construct_at(current_command[0], current_command[2])
-                elif current_command[1] == self.DEPOSIT_RESOURCES:
-                    self.api.deposit_resources(current_command[0], current_command[2], current_command[3])
+        if self.queue is not None:
+            self.search(self.PLANNING_BUDGET)
+        self.plan = self.best_state.path[len(self.committed):]
+        # Commands are given in the order of the plan. If a command is given late because the search was still running,
+        # the rest of the plan is delayed by the same number of ticks
+        while self.plan and current_tick >= self.plan[0][-1] + self.delay:
+            current_command = self.plan.pop(0)
+            self.committed.append(current_command)
+            self.delay = current_tick - current_command[-1]
+            if current_command[1] == self.MOVE_TO:
+                self.api.move_to(current_command[0], current_command[2])
+            elif current_command[1] == self.PICK_UP_RESOURCE:
+                self.api.pick_up_resource(current_command[0], current_command[2])
+            elif current_command[1] == self.DROP_RESOURCE:
+                self.api.drop_resource(current_command[0], current_command[2])
+            elif current_command[1] == self.DROP_ALL_RESOURCES:
+                self.api.drop_all_resources(current_command[0])
+            elif current_command[1] == self.DIG_AT:
+                self.api.dig_at(current_command[0], current_command[2])
+            elif current_command[1] == self.START_SITE:
+                self.api.start_site(current_command[0], 0, current_command[2])
+            elif current_command[1] == self.CONSTRUCT_AT:
+                self.api.construct_at(current_command[0], current_command[2])
+            elif current_command[1] == self.DEPOSIT_RESOURCES:
+                self.api.deposit_resources(current_command[0], current_command[2], current_command[3])
         self.thinking = False
 
-    def get_available_commands(self, state):
-        info = state.info
+    def __getstate__(self):
+        # Only the parts of the agent that are needed to predict outcomes are sent to the MCTS worker processes
+        state = self.__dict__.copy()
+        for attribute in ["api", "world_info", "transposition_table", "pool", "plan", "queue", "tie_breaker",
+                          "best_state"]:
+            state.pop(attribute, None)
+        return state
+
+    def get_available_commands(self, info):
         call_tick = info["tick"]
         available_commands = []
         for actor in info["actors"].values():
@@ -81,7 +127,7 @@ class PlanningAgent:
                 for edge in current_node["edges"]:
                     available_commands.append(
                         (actor["id"], self.MOVE_TO,
-                        info["edges"][edge]["get_other_node"](current_node["id"]), call_tick))
+                        self.get_other_node(info, edge, current_node["id"]), call_tick))
 
                 # Pick up any resources that are on the same node as the actor
                 for resource in current_node["resources"]:
@@ -124,7 +170,127 @@ class PlanningAgent:
         return available_commands
 
     def predict_outcome(self, info, command=None):
-        new_info = deepcopy(info)
+        """
+        Predicts the world_info after the command is performed, skipping ahead while every actor is busy. The given
+        world_info is not changed, and the prediction shares every entity that does not change with it.
+
+        :param info: (dict) of CraftBots world info
+        :param command: (optional) the command to be performed, as given by get_available_commands
+        :return: (dict) the predicted world info
+        """
+        new_info, copied = self.copy_info(info)
+        self.predict_tick(new_info, copied, command)
+
+        while self.all_busy(new_info) and new_info["tick"] < self.TICK_HZ * self.SIM_LENGTH:
+            # Nothing changes but progress until the next event, so jump straight to the tick it happens on
+            self.skip_ticks(new_info, copied, self.ticks_to_next_event(new_info) - 1)
+            self.predict_tick(new_info, copied)
+
+        return new_info
+
+    def ticks_to_next_event(self, info):
+        """
+        Works out how many ticks it will be until an actor arrives at a node, a mine produces a resource, or a site is
+        finished or runs out of resources to build with, assuming no commands are given in the meantime.
+
+        :param info: (dict) of CraftBots world info
+        :return: (int) the number of ticks until the next event, at least 1, and at most the ticks left in the simulation
+        """
+        ticks = self.TICK_HZ * self.SIM_LENGTH - info["tick"]
+        mine_diggers = {}
+        site_builders = {}
+        for actor in info["actors"].values():
+            if actor["state"] == self.MOVING:
+                remaining_distance = info["edges"][actor["target"][0]]["length"] - actor["progress"]
+                ticks = min(ticks, math.ceil(remaining_distance / self.ACTOR_MOVE_SPEED))
+            elif actor["state"] == self.DIGGING:
+                mine_diggers[actor["target"]] = mine_diggers.get(actor["target"], 0) + 1
+            elif actor["state"] == self.CONSTRUCTING:
+                site_builders[actor["target"]] = site_builders.get(actor["target"], 0) + 1
+
+        for mine, diggers in mine_diggers.items():
+            remaining_effort = self.MINE_EFFORT - info["mines"][mine]["progress"]
+            ticks = min(ticks, math.ceil(remaining_effort / (self.DIG_SPEED * diggers)))
+
+        for site, builders in site_builders.items():
+            max_progress = self.BUILD_EFFORT * sum(info["sites"][site]["deposited_resources"])
+            needed_progress = self.BUILD_EFFORT * sum(info["sites"][site]["needed_resources"])
+            remaining_effort = min(max_progress, needed_progress) - info["sites"][site]["progress"]
+            ticks = min(ticks, math.ceil(remaining_effort / (self.BUILD_SPEED * builders)))
+
+        return max(ticks, 1)
+
+    def skip_ticks(self, new_info, copied, ticks):
+        """
+        Predicts a number of ticks in place in which no events happen, so the only change is the progress of the actors.
+
+        :param new_info: (dict) of CraftBots world info, as given by copy_info
+        :param copied: (set) the entities that have been copied, as given by copy_info
+        :param ticks: (int) the number of ticks to skip, which must be less than ticks_to_next_event
+        """
+        if ticks <= 0:
+            return
+        new_info["tick"] = new_info["tick"] + ticks
+        for actor_id in new_info["actors"]:
+            actor = new_info["actors"][actor_id]
+            if actor["state"] == self.MOVING:
+                self.get_writable(new_info, copied, "actors", actor_id)["progress"] += self.ACTOR_MOVE_SPEED * ticks
+            elif actor["state"] == self.DIGGING:
+                self.get_writable(new_info, copied, "mines", actor["target"])["progress"] += self.DIG_SPEED * ticks
+            elif actor["state"] == self.CONSTRUCTING:
+                site = self.get_writable(new_info, copied, "sites", actor["target"])
+                site["progress"] = min(site["progress"] + self.BUILD_SPEED * ticks,
+                                       self.BUILD_EFFORT * sum(site["deposited_resources"]))
+
+    def copy_info(self, info):
+        """
+        Copies world_info without copying any entities. Each entity is shared with the original until it is written to
+        through get_writable, so that the original is never changed.
+
+        :param info: (dict) of CraftBots world info
+        :return: (dict) the copy of the world info, and (set) the (category, id) of the entities that have been copied
+        """
+        new_info = {}
+        for key in info:
+            new_info[key] = info[key].copy() if isinstance(info[key], dict) else info[key]
+        return new_info, set()
+
+    def get_writable(self, info, copied, category, entity_id):
+        """
+        Gets an entity that can be changed, copying it and its lists the first time it is written to.
+
+        :param info: (dict) of CraftBots world info, as given by copy_info
+        :param copied: (set) the entities that have been copied, as given by copy_info
+        :param category: (str) the key of the entities in world_info, e.g. "actors"
+        :param entity_id: (int) the id of the entity
+        :return: (dict) the fields of the entity
+        """
+        if (category, entity_id) not in copied:
+            entity = info[category][entity_id].copy()
+            for field in entity:
+                if isinstance(entity[field], list):
+                    entity[field] = entity[field][:]
+            info[category][entity_id] = entity
+            copied.add((category, entity_id))
+        return info[category][entity_id]
+
+    def all_busy(self, info):
+        for actor in info["actors"]:
+            if info["actors"][actor]["state"] == self.IDLE:
+                return False
+        return True
+
+    def predict_tick(self, new_info, copied, command=None):
+        """
+        Predicts a single tick in place, with the command performed at the end of the tick.
+
+        :param new_info: (dict) of CraftBots world info, as given by copy_info
+        :param copied: (set) the entities that have been copied, as given by copy_info
+        :param command: (optional) the command to be performed, as given by get_available_commands
+        """
+        def writable(category, entity_id):
+            return self.get_writable(new_info, copied, category, entity_id)
+
         new_info["tick"] = new_info["tick"] + 1
         if command is not None:
             new_info["commands"][self.get_next_id(new_info)] = command
@@ -133,21 +299,21 @@ class PlanningAgent:
             current_node = new_info["actors"][actor_id]["node"]
 
             if new_info["actors"][actor_id]["state"] == self.MOVING:
-                new_info["actors"][actor_id]["progress"] += self.ACTOR_MOVE_SPEED
+                writable("actors", actor_id)["progress"] += self.ACTOR_MOVE_SPEED
                 target = new_info["actors"][actor_id]["target"]
 
                 if new_info["actors"][actor_id]["progress"] >= new_info["edges"][target[0]]["length"]:
-                    new_info["nodes"][current_node]["actors"].remove(actor_id)
-                    new_info["nodes"][target[1]]["actors"].append(actor_id)
-                    new_info["actors"][actor_id]["node"] = target[1]
-                    new_info["actors"][actor_id]["state"] = self.IDLE
+                    writable("nodes", current_node)["actors"].remove(actor_id)
+                    writable("nodes", target[1])["actors"].append(actor_id)
+                    writable("actors", actor_id)["node"] = target[1]
+                    writable("actors", actor_id)["state"] = self.IDLE
 
             elif new_info["actors"][actor_id]["state"] == self.DIGGING:
                 target = new_info["actors"][actor_id]["target"]
-                new_info["mines"][target]["progress"] += self.DIG_SPEED
+                writable("mines", target)["progress"] += self.DIG_SPEED
 
                 if new_info["mines"][target]["progress"] >= self.MINE_EFFORT:
-                    new_info["mines"][target]["progress"] = 0
+                    writable("mines", target)["progress"] = 0
                     new_resource_id = self.get_next_id(new_info)
                     new_info["resources"][new_resource_id] = \
                         {"id": new_resource_id,
@@ -155,17 +321,18 @@ class PlanningAgent:
                          "tick_created": new_info["tick"],
                          "used": False,
                          "colour": new_info["mines"][target]["colour"]}
-                    new_info["nodes"][current_node]["resources"].append(new_resource_id)
+                    copied.add(("resources", new_resource_id))
+                    writable("nodes", current_node)["resources"].append(new_resource_id)
 
                     for digging_actor in new_info["actors"]:
                         if new_info["actors"][digging_actor]["target"] == target:
-                            new_info["actors"][digging_actor]["target"] = None
-                            new_info["actors"][digging_actor]["state"] = self.IDLE
+                            writable("actors", digging_actor)["target"] = None
+                            writable("actors", digging_actor)["state"] = self.IDLE
 
             elif new_info["actors"][actor_id]["state"] == self.CONSTRUCTING:
                 target = new_info["actors"][actor_id]["target"]
                 max_progress = self.BUILD_EFFORT * sum(new_info["sites"][target]["deposited_resources"])
-                new_info["sites"][target]["progress"] = min(self.BUILD_SPEED + new_info["sites"][target]["progress"], max_progress)
+                writable("sites", target)["progress"] = min(self.BUILD_SPEED + new_info["sites"][target]["progress"], max_progress)
 
                 if new_info["sites"][target]["progress"] >= self.BUILD_EFFORT * sum(new_info["sites"][target]["needed_resources"]):
                     new_building_id = self.get_next_id(new_info)
@@ -173,53 +340,54 @@ class PlanningAgent:
                         {"node": current_node,
                          "building_type": 0,
                          "id": new_building_id}
-                    new_info["nodes"][current_node]["buildings"] = new_building_id
+                    copied.add(("buildings", new_building_id))
+                    writable("nodes", current_node)["buildings"] = new_building_id
 
                     for building_actor in new_info["actors"]:
                         if new_info["actors"][building_actor]["target"] == target:
-                            new_info["actors"][building_actor]["target"] = None
-                            new_info["actors"][building_actor]["state"] = self.IDLE
+                            writable("actors", building_actor)["target"] = None
+                            writable("actors", building_actor)["state"] = self.IDLE
 
-                    new_info["tasks"][new_info["sites"][target]["task"]]["project"] = new_building_id
-                    new_info["nodes"][current_node]["sites"].remove(target)
+                    writable("tasks", new_info["sites"][target]["task"])["project"] = new_building_id
+                    writable("nodes", current_node)["sites"].remove(target)
                     new_info["sites"].pop(target)
 
                 elif new_info["sites"][target]["progress"] == max_progress:
                     for building_actor in new_info["actors"]:
                         if new_info["actors"][building_actor]["target"] == target:
-                            new_info["actors"][building_actor]["target"] = None
-                            new_info["actors"][building_actor]["state"] = self.IDLE
+                            writable("actors", building_actor)["target"] = None
+                            writable("actors", building_actor)["state"] = self.IDLE
 
         if command is not None:
             current_node = new_info["actors"][command[0]]["node"]
             if command[1] == self.MOVE_TO:
                 target_edge = None
                 for edge in new_info["nodes"][current_node]["edges"]:
-                    if new_info["edges"][edge]["get_other_node"](command[2]) == current_node:
+                    if self.get_other_node(new_info, edge, command[2]) == current_node:
                         target_edge = edge
-                new_info["actors"][command[0]]["target"] = (target_edge, command[2])
-                new_info["actors"][command[0]]["state"] = self.MOVING
-                new_info["actors"][command[0]]["progress"] = 0
+                writable("actors", command[0])["target"] = (target_edge, command[2])
+                writable("actors", command[0])["state"] = self.MOVING
+                writable("actors", command[0])["progress"] = 0
 
             elif command[1] == self.PICK_UP_RESOURCE:
-                new_info["nodes"][current_node]["resources"].remove(command[2])
-                new_info["actors"][command[0]]["resources"].append(command[2])
-                new_info["resources"][command[2]]["location"] = command[0]
+                writable("nodes", current_node)["resources"].remove(command[2])
+                writable("actors", command[0])["resources"].append(command[2])
+                writable("resources", command[2])["location"] = command[0]
 
             elif command[1] == self.DROP_RESOURCE:
-                new_info["nodes"][current_node]["resources"].append(command[2])
-                new_info["actors"][command[0]]["resources"].remove(command[2])
-                new_info["resources"][command[2]]["location"] = current_node
+                writable("nodes", current_node)["resources"].append(command[2])
+                writable("actors", command[0])["resources"].remove(command[2])
+                writable("resources", command[2])["location"] = current_node
 
             elif command[1] == self.DROP_ALL_RESOURCES:
-                for resource in new_info["actors"][command[0]]["resources"]:
-                    new_info["nodes"][current_node]["resources"].append(resource)
-                    new_info["actors"][command[0]]["resources"].remove(resource)
-                    new_info["resources"][resource]["location"] = current_node
+                for resource in writable("actors", command[0])["resources"]:
+                    writable("nodes", current_node)["resources"].append(resource)
+                    writable("actors", command[0])["resources"].remove(resource)
+                    writable("resources", resource)["location"] = current_node
 
             elif command[1] == self.DIG_AT:
-                new_info["actors"][command[0]]["state"] = self.DIGGING
-                new_info["actors"][command[0]]["target"] = command[2]
+                writable("actors", command[0])["state"] = self.DIGGING
+                writable("actors", command[0])["target"] = command[2]
 
             elif command[1] == self.START_SITE:
                 new_site_id = self.get_next_id(new_info)
@@ -231,29 +399,20 @@ class PlanningAgent:
                      "progress": 0,
                      "id": new_site_id,
                      "task": command[2]}
-                new_info["nodes"][current_node]["sites"].append(new_site_id)
-                new_info["tasks"][command[2]]["project"] = new_site_id
+                copied.add(("sites", new_site_id))
+                writable("nodes", current_node)["sites"].append(new_site_id)
+                writable("tasks", command[2])["project"] = new_site_id
 
             elif command[1] == self.CONSTRUCT_AT:
-                new_info["actors"][command[0]]["state"] = self.CONSTRUCTING
-                new_info["actors"][command[0]]["target"] = command[2]
+                writable("actors", command[0])["state"] = self.CONSTRUCTING
+                writable("actors", command[0])["target"] = command[2]
 
             elif command[1] == self.DEPOSIT_RESOURCES:
                 resource_colour = new_info["resources"][command[3]]["colour"]
-                new_info["actors"][command[0]]["resources"].remove(command[3])
-                new_info["sites"][command[2]]["deposited_resources"][resource_colour] += 1
+                writable("actors", command[0])["resources"].remove(command[3])
+                writable("sites", command[2])["deposited_resources"][resource_colour] += 1
                 new_info["resources"].pop(command[3])
 
-        all_busy = True
-        for actor in new_info["actors"]:
-            if new_info["actors"][actor]["state"] == self.IDLE:
-                all_busy = False
-
-        if all_busy and new_info["tick"] < self.TICK_HZ * self.SIM_LENGTH:
-            return self.predict_outcome(new_info)
-
-        return new_info
-
     def get_next_id(self, info):
         """
         Given a dictionary of world_info, returns what the id a new entity would be given
@@ -267,93 +426,275 @@ class PlanningAgent:
                     max_id = max(int_key, max_id)
         return max_id + 1
     
+    def get_state_key(self, info):
+        """
+        Gives a key for a world_info that is the same for any two world infos that only differ in the commands that were
+        used to get to them, so that states reached in different orders can be recognised as the same state. The key
+        covers everything the score of a state is worked out from, so states with the same key have the same score.
+
+        :param info: (dict) of CraftBots world info
+        :return: (tuple) the key of the state
+        """
+        return (info["tick"],
+                tuple((actor["id"], actor["node"], actor["state"], actor["target"], actor["progress"],
+                       tuple(sorted(actor["resources"]))) for actor in info["actors"].values()),
+                tuple((mine["id"], mine["progress"]) for mine in info["mines"].values()),
+                tuple(sorted((site["id"], site["progress"], tuple(site["deposited_resources"]))
+                             for site in info["sites"].values())),
+                tuple(sorted((resource["id"], resource["location"], resource["colour"])
+                             for resource in info["resources"].values())),
+                tuple(sorted(info["buildings"])),
+                tuple((task["id"], task["project"]) for task in info["tasks"].values()))
+
+    def check_transposition(self, info):
+        """
+        Checks if a state has been reached before, and remembers it if not. Only the TRANSPOSITION_TABLE_SIZE most
+        recently seen states are remembered.
+
+        A state that has been reached before has the same score as when it was first reached, so it is never better
+        than the copy that is already being searched. Even so, pruning it changes the search: its successors are not
+        searched a second time, and the states that are left are expanded in a different order. The number of states
+        checked and the plan that is found can differ from a search without the table.
+
+        :param info: (dict) of CraftBots world info
+        :return: (bool) True if the state has been reached before, and False otherwise
+        """
+        key = self.get_state_key(info)
+        if key in self.transposition_table:
+            self.transposition_table.move_to_end(key)
+            self.transposition_hits += 1
+            return True
+        self.transposition_table[key] = None
+        self.transposition_misses += 1
+        if len(self.transposition_table) > self.TRANSPOSITION_TABLE_SIZE:
+            self.transposition_table.popitem(last=False)
+        return False
+
     def bfs(self, info):
-        c = 0
-        current_state = State(info, task = self.current_task)
-        queue = [current_state]
-        while queue:
-            c += 1
-            current_state = queue.pop()
+        """
+        Searches for a plan that finishes the current task, without a time limit.
+
+        :param info: (dict) of CraftBots world info
+        :return: The list of commands of the plan
+        """
+        self.start_search(info)
+        self.search()
+        return self.best_state.path
+
+    def start_search(self, info):
+        """
+        Starts a new best first search from the given world_info. The search is run with search, and can be spread over
+        many ticks.
+
+        :param info: (dict) of CraftBots world info
+        """
+        self.states_checked = 0
+        self.committed = []
+        self.delay = 0
+        self.transposition_table.clear()
+        self.best_state = State(info, task = self.current_task, api = self.api)
+        self.check_transposition(info)
+        # States with the highest score are expanded first. Many states share a score, and expanding those in the order
+        # they were found (or the reverse) spreads the search across them, so ties are broken in a random order that is
+        # the same for every search
+        self.queue = PriorityQueue()
+        self.tie_breaker = random.Random(0)
+        self.queue.push(self.best_state, (-self.best_state.score, self.tie_breaker.random()))
+
+    def search(self, budget=None):
+        """
+        Continues the search until a state that finishes the current task is found, there are no more states to expand,
+        or the budget runs out. The best plan found so far is kept in best_state. States that do not follow the commands
+        that have already been given are not expanded, so the plan can be followed while it is still being searched for.
+
+        :param budget: (optional) the number of milliseconds to search for. Default: None (search until the search ends)
+        :return: True if the search has ended, and False if the budget ran out first
+        """
+        deadline = None if budget is None else time.perf_counter() + budget / 1000
+        while self.queue:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            current_state, _ = self.queue.pop()
+            if not self.follows_plan(current_state):
+                continue
+            self.states_checked += 1
+            c = self.states_checked
             if c % 10 == 0 and c > 1:
-                print(f"States checked: {c}, Current heuristic: {current_state.score}, Last command : {current_state.path[-1]} ,Tick: {current_state.info['tick']}, True Score: {current_state.true_score()}, Queue length: {len(queue)}")
+                print(f"States checked: {c}, Current heuristic: {current_state.score}, Last command : {current_state.path[-1]} ,Tick: {current_state.info['tick']}, True Score: {current_state.true_score()}, Queue length: {len(self.queue)}")
             if current_state.finished():
                 print(f"Checked {c} different states to get plan")
-                return current_state.path
+                print(f"Transposition table hits: {self.transposition_hits}, misses: {self.transposition_misses}")
+                self.best_state = current_state
+                self.queue = None
+                return True
 
-            commands = self.get_available_commands(current_state)
+            commands = self.get_available_commands(current_state.info)
             for command in commands:
-                new_state = State(self.predict_outcome(current_state.info, command), current_state, command, task=self.current_task)
-                queue.insert(self.bin_insert_pos(queue, new_state, 0, len(queue) - 1), new_state)
+                new_info = self.predict_outcome(current_state.info, command)
+                # The same state can be reached by giving the same commands in a different order, but is only kept once
+                if self.check_transposition(new_info):
+                    continue
+                new_state = State(new_info, current_state, command, task=self.current_task)
+                if new_state.score > self.best_state.score:
+                    self.best_state = new_state
+                self.queue.push(new_state, (-new_state.score, self.tie_breaker.random()))
         print("Ran out of states to expand")
-        return current_state.path
-
-    def bin_insert_pos(self, queue, state, start, stop):
-        if start == stop:
-            if queue[start] > state:
-                return start
-            return start + 1
-        if start > stop:
-            return start
-
-        mid = (start + stop) // 2
-        if queue[mid] < state:
-            return self.bin_insert_pos(queue, state, mid + 1, stop)
-        elif queue[mid] > state:
-            return self.bin_insert_pos(queue, state, start, mid - 1)
-        return mid
-
-    def MCTS(self, info):
+        print(f"Transposition table hits: {self.transposition_hits}, misses: {self.transposition_misses}")
+        self.queue = None
+        return True
+
+    def follows_plan(self, state):
+        """
+        :param state: a State of the search
+        :return: True if the path to the state starts with the commands that have already been given, and False otherwise
+        """
+        return state.path[:len(self.committed)] == self.committed
+
+    @staticmethod
+    def get_available_cores():
+        # The cores the process may run on are only known on some platforms
+        try:
+            return len(os.sched_getaffinity(0))
+        except AttributeError:
+            return os.cpu_count() or 1
+
+    def close(self):
+        """
+        Stops the MCTS worker processes. Called by the simulation once it has finished.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def MCTS(self, info, time_limit=None):
+        """
+        Plans with root parallel Monte Carlo tree search. Each worker process builds its own tree from the given
+        world_info with its own random number generator, and the visits and values of the trees are merged before the
+        plan is picked. The number of rollouts grows with the number of workers, which is every available core unless
+        MCTS_WORKERS is set.
+
+        :param info: (dict) of CraftBots world info
+        :param time_limit: (optional) the number of seconds each worker may spend on rollouts. Default: None (each worker
+        performs MCTS_ROLLOUTS rollouts)
+        :return: The list of commands leading to the most visited state of the merged tree
+        """
+        info = self.serializable_info(info)
+        workers = self.MCTS_WORKERS if self.MCTS_WORKERS is not None else self.get_available_cores()
+        seeds = [random.getrandbits(32) for _ in range(workers)]
+        if workers > 1:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=workers)
+            futures = [self.pool.submit(self.search_tree, info, self.MCTS_ROLLOUTS, seed, time_limit) for seed in seeds]
+            trees = [future.result() for future in futures]
+        else:
+            trees = [self.search_tree(info, self.MCTS_ROLLOUTS, seeds[0], time_limit)]
+
+        stats = {}
+        for tree in trees:
+            for path, (v, n) in tree.items():
+                if path in stats:
+                    stats[path][0] += v
+                    stats[path][1] += n
+                else:
+                    stats[path] = [v, n]
+
+        # Follow the most visited children of the merged tree
+        children = {}
+        for path in stats:
+            if path:
+                children.setdefault(path[:-1], []).append(path)
+        path = ()
+        while path in children:
+            path = max(children[path], key=lambda p: stats[p][1])
+        print(f"Merged {stats[()][1]} rollouts from {workers} workers")
+        return list(path)
+
+    def search_tree(self, info, rollouts, seed=None, time_limit=None):
+        """
+        Builds a Monte Carlo search tree from the given world_info. Each rollout picks a leaf using UCB, expands it if it
+        has been visited before, and then performs random commands from it until the simulation would finish.
+
+        :param info: (dict) of CraftBots world info, without any callable fields
+        :param rollouts: the most rollouts to perform
+        :param seed: (optional) the seed of the random number generator used to pick commands. Default: None
+        :param time_limit: (optional) the number of seconds to perform rollouts for. Default: None (no limit)
+        :return: A dictionary of the total value and number of visits of each state in the tree, keyed by the tuple of
+        commands leading to the state
+        """
         def UCB(v, n, C = 2):
             if n == 0:
                 return math.inf
-            return v + C * math.sqrt(math.log(N, math.e)/n)
+            return v / n + C * math.sqrt(math.log(N, math.e) / n)
 
         def rollout(r_info):
-            print("Rolling out current state")
-            r = 0
             current_info = r_info
             while not self.finished(current_info):
-                r += 1
-                current_info = self.predict_outcome(current_info, random.choice(self.get_available_commands(current_info)))
-                print(f"Ran {r} commands. On tick {current_info['tick']}")
-            return self.true_score(info)
-
-        def back_prop(state, v):
-            state.v += v
-            state.n += 1
-            if state is not parent_state:
-                back_prop(state.parent, v)
-
-        parent_state = State(info)
+                commands = self.get_available_commands(current_info)
+                current_info = self.predict_outcome(current_info, rng.choice(commands) if commands else None)
+            return self.true_score(current_info)
+
+        rng = random.Random(seed)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        stats = {(): [0, 0]}
+        infos = {(): info}
+        children = {}
         N = 0
-        while N < 1000:
-            current_state = parent_state
-            print(N)
-            while current_state.children:
-                ucb_values = list(map(lambda s: UCB(s.v, s.n), current_state.children))
-                current_state = current_state.children[ucb_values.index(max(ucb_values))]
-
-            if current_state.n:
-                commands = self.get_available_commands(current_state.info)
-                for command in commands:
-                    State(self.predict_outcome(current_state.info, command), current_state, command)
-                current_state = current_state.children[0]
-
-            back_prop(current_state, current_state.score)
+        while N < rollouts and (deadline is None or time.perf_counter() < deadline):
             N += 1
+            path = ()
+            while children.get(path):
+                path = max(children[path], key=lambda p: UCB(stats[p][0], stats[p][1]))
+
+            if stats[path][1] and not self.finished(infos[path]):
+                children[path] = []
+                for command in self.get_available_commands(infos[path]):
+                    child = path + (command,)
+                    infos[child] = self.predict_outcome(infos[path], command)
+                    stats[child] = [0, 0]
+                    children[path].append(child)
+                if children[path]:
+                    path = rng.choice(children[path])
+
+            v = rollout(infos[path])
+            for i in range(len(path) + 1):
+                stats[path[:i]][0] += v
+                stats[path[:i]][1] += 1
+        return stats
+
+    @staticmethod
+    def serializable_info(info):
+        """
+        Gives a copy of the world_info without the callable fields of the tasks and edges, so that it can be sent to
+        another process. Entities without callable fields are shared with the given world_info.
 
-        current_state = parent_state
-
-        while not current_state.children:
-            ucb_values = list(map(lambda s: UCB(s.v, s.n), current_state.children))
-            current_state = current_state.children[ucb_values.index(max(ucb_values))]
+        :param info: (dict) of CraftBots world info
+        :return: The world_info without callable fields
+        """
+        new_info = info.copy()
+        for category in ["tasks", "edges"]:
+            new_info[category] = {entity_id: {field: value for field, value in entity.items() if not callable(value)}
+                                  for entity_id, entity in info[category].items()}
+        return new_info
 
-        return current_state.path
+    @staticmethod
+    def get_other_node(info, edge_id, node_id):
+        """
+        :param info: (dict) of CraftBots world info
+        :param edge_id: the id of the edge
+        :param node_id: the id of the node to be compared against the nodes of the edge
+        :return: The id of the other node the edge connects if the node is connected to the edge. Otherwise returns None
+        """
+        edge = info["edges"][edge_id]
+        if edge["node_a"] == node_id:
+            return edge["node_b"]
+        elif edge["node_b"] == node_id:
+            return edge["node_a"]
+        return None
 
     def true_score(self, info):
         score = 0
         for task_id in info["tasks"]:
-            if info["tasks"][task_id]["completed"]():
+            if info["tasks"][task_id]["project"] in info["buildings"]:
                 needed_resources = sum(info["tasks"][task_id]["needed_resources"])
                 score += (self.TASK_SCORE_A * needed_resources) + (
                         self.TASK_SCORE_B * needed_resources) ** self.TASK_SCORE_C
@@ -373,9 +714,11 @@ class State:
     SIM_LENGTH = 240
     TICK_HZ = 60
     
-    def __init__(self, info, parent = None, last_command = None, task = None):
+    def __init__(self, info, parent = None, last_command = None, task = None, api = None):
         self.info = info
         self.task = task
+        # The API is only used for the shortest paths between nodes, which do not change between states
+        self.api = api if api is not None or parent is None else parent.api
 
 
         """
@@ -497,7 +840,7 @@ class State:
     def true_score(self):
         score = 0
         for task_id in self.info["tasks"]:
-            if self.info["tasks"][task_id]["completed"]():
+            if self.info["tasks"][task_id]["project"] in self.info["buildings"]:
                 needed_resources = sum(self.info["tasks"][task_id]["needed_resources"])
                 score += (self.TASK_SCORE_A * needed_resources) + (
                             self.TASK_SCORE_B * needed_resources) ** self.TASK_SCORE_C
@@ -516,7 +859,20 @@ class State:
                     return True
             return False
 
-        return self.find_path_to(self.info["actors"][actor]["node"], check_mines)
+        start = self.info["actors"][actor]["node"]
+        if self.api is not None and self.api.get_path(start, start) is not None:
+            # The world has the distance between every pair of nodes, so the mines can be compared directly
+            closest_node = None
+            closest_distance = math.inf
+            for mine in self.info["mines"].values():
+                if mine["colour"] == colour:
+                    distance = self.api.get_distance(start, mine["node"])
+                    if distance < closest_distance:
+                        closest_node = mine["node"]
+                        closest_distance = distance
+            return None if closest_node is None else (self.api.get_path(start, closest_node), closest_distance)
+
+        return self.find_path_to(start, check_mines)
 
     def resource_path_to_task(self, resource):
         location = self.info["resources"][resource]["location"]
@@ -525,7 +881,11 @@ class State:
             location = self.info["actors"][location]["node"]
             actor_bonus = 1
 
-        path = self.find_path_to(location, lambda n : self.info["tasks"][self.task]["node"] == n)
+        task_node = self.info["tasks"][self.task]["node"]
+        if self.api is not None and self.api.get_path(location, task_node) is not None:
+            path = (self.api.get_path(location, task_node), self.api.get_distance(location, task_node))
+        else:
+            path = self.find_path_to(location, lambda n : task_node == n)
 
         num_of_nodes = len(self.info["nodes"])
 
@@ -534,35 +894,27 @@ class State:
     def find_path_to(self, start, goal):
         # finds the closest mine of the given colour to the specific node
 
-        def smallest_key(frontier):
-            shortest_path = math.inf
-            shortest_key = None
-            for path in frontier.keys():
-                if frontier[path][1] < shortest_path:
-                    shortest_path = frontier[path][1]
-                    shortest_key = path
-            return shortest_key
-
         # nodes are referenced as their ID's
         current_path = ([start], 0)
-        frontier = {start: current_path}
+        frontier = PriorityQueue()
+        frontier.push(current_path, current_path[1], start)
         explored = {}
         while True:
             if frontier:
-                current_path = frontier.pop(smallest_key(frontier))
+                current_path, _ = frontier.pop()
                 if goal(current_path[0][-1]):
                     return current_path
                 explored[current_path[0][-1]] = current_path
                 for edge in self.info["nodes"][current_path[0][-1]]["edges"]:
                     # edge is id of an edge connected to current_path[0][-1]
                     length = self.info["edges"][edge]["length"]
-                    next_node = self.info["edges"][edge]["get_other_node"](current_path[0][-1])
+                    next_node = PlanningAgent.get_other_node(self.info, edge, current_path[0][-1])
                     path = current_path[0][:]
                     path.append(next_node)
                     new_path = (path, current_path[1] + length)
                     if explored.__contains__(next_node) and explored[next_node][1] > new_path[1]:
                         explored[next_node] = new_path
-                    elif not frontier.__contains__(next_node) or frontier[next_node][1] > new_path[1]:
-                        frontier[next_node] = new_path
+                    elif not frontier.__contains__(next_node) or frontier.get(next_node)[1] > new_path[1]:
+                        frontier.push(new_path, new_path[1], next_node)
             else:
                 return None
\ No newline at end of file
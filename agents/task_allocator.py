@@ -1,6 +1,7 @@
 import math
 
 import api.agent_api
+from api.priority_queue import PriorityQueue
 
 DEBUG = 5
 INVENTORY_SPACE = 3
@@ -362,23 +363,24 @@ class ActorController:
 
     def find_mine(self, node, colour):
         # finds the closest mine of the given colour to the specific node
-
-        def smallest_key(frontier):
-            shortest_path = math.inf
-            shortest_key = None
-            for path in frontier.keys():
-                if frontier[path][1] < shortest_path:
-                    shortest_path = frontier[path][1]
-                    shortest_key = path
-            return shortest_key
+        if self.api.get_path(node, node) is not None:
+            # The world has the distance between every pair of nodes, so the mines can be compared directly
+            closest_mine = None
+            for mine in self.master.world_info["mines"].values():
+                if mine["colour"] == colour:
+                    distance = self.api.get_distance(node, mine["node"])
+                    if distance < math.inf and (closest_mine is None or distance < closest_mine[2]):
+                        closest_mine = (mine["id"], mine["node"], distance)
+            return closest_mine
 
         # nodes are referenced as their ID's
         current_path = ([node], 0)
-        frontier = {node: current_path}
+        frontier = PriorityQueue()
+        frontier.push(current_path, current_path[1], node)
         explored = {}
         while True:
             if frontier:
-                current_path = frontier.pop(smallest_key(frontier))
+                current_path, _ = frontier.pop()
                 mines = self.api.get_field(current_path[0][-1], "mines")
                 for mine in mines:
                     if self.api.get_field(mine, "colour") == colour:
@@ -393,8 +395,8 @@ class ActorController:
                     new_path = (path, current_path[1] + length)
                     if explored.__contains__(next_node) and explored[next_node][1] > new_path[1]:
                         explored[next_node] = new_path
-                    elif not frontier.__contains__(next_node) or frontier[next_node][1] > new_path[1]:
-                        frontier[next_node] = new_path
+                    elif not frontier.__contains__(next_node) or frontier.get(next_node)[1] > new_path[1]:
+                        frontier.push(new_path, new_path[1], next_node)
             else:
                 return None
 
@@ -402,22 +404,14 @@ class ActorController:
         # finds the closest mine of the given colour to the specific node
         # TODO: this causes an infinite loop when there is no resource to find. Also, doesnt check if the resource is reserved in any way
         # TODO: if some resources are found but its not enough then more needs to be found later
-        def smallest_key(frontier):
-            shortest_path = math.inf
-            shortest_key = None
-            for path in frontier.keys():
-                if frontier[path][1] < shortest_path:
-                    shortest_path = frontier[path][1]
-                    shortest_key = path
-            return shortest_key
-
         # nodes are referenced as their ID's
         current_path = ([node], 0)
-        frontier = {node: current_path}
+        frontier = PriorityQueue()
+        frontier.push(current_path, current_path[1], node)
         explored = {}
         while True:
             if frontier:
-                current_path = frontier.pop(smallest_key(frontier))
+                current_path, _ = frontier.pop()
                 resources = self.api.get_field(current_path[0][-1], "resources")
                 if len(list(filter(lambda resource: self.api.get_field(resource, "colour") == colour
                                                     and resource in self.master.reserved_resources
@@ -435,29 +429,25 @@ class ActorController:
                     if explored.__contains__(next_node) and explored[next_node][1] > new_path[1]:
                         explored[next_node] = new_path
                     elif not (explored.__contains__(next_node) or frontier.__contains__(next_node)) or (
-                            frontier.__contains__(next_node) and frontier[next_node][1] > new_path[1]):
-                        frontier[next_node] = new_path
+                            frontier.__contains__(next_node) and frontier.get(next_node)[1] > new_path[1]):
+                        frontier.push(new_path, new_path[1], next_node)
             else:
                 return None
 
     def bfs_pathfinding(self, start_node, end_node):
-
-        def smallest_key(frontier):
-            shortest_path = math.inf
-            shortest_key = None
-            for path in frontier.keys():
-                if frontier[path][1] < shortest_path:
-                    shortest_path = frontier[path][1]
-                    shortest_key = path
-            return shortest_key
+        path = self.api.get_path(start_node, end_node)
+        if path is not None:
+            # The world has the shortest path between every pair of nodes
+            return (path, self.api.get_distance(start_node, end_node)) if path else []
 
         # nodes are referenced as their ID's
         current_path = ([start_node], 0)
-        frontier = {start_node: current_path}
+        frontier = PriorityQueue()
+        frontier.push(current_path, current_path[1], start_node)
         explored = {}
         while True:
             if frontier:
-                current_path = frontier.pop(smallest_key(frontier))
+                current_path, _ = frontier.pop()
                 if current_path[0][-1] == end_node: return current_path[0], current_path[1]
                 explored[current_path[0][-1]] = current_path
                 for edge in self.api.get_field(current_path[0][-1], "edges"):
@@ -469,8 +459,8 @@ class ActorController:
                     new_path = (path, current_path[1] + length)
                     if explored.__contains__(next_node) and explored[next_node][1] > new_path[1]:
                         explored[next_node] = new_path
-                    elif not frontier.__contains__(next_node) or frontier[next_node][1] > new_path[1]:
-                        frontier[next_node] = new_path
+                    elif not frontier.__contains__(next_node) or frontier.get(next_node)[1] > new_path[1]:
+                        frontier.push(new_path, new_path[1], next_node)
             else:
                 return []
 
@@ -1,4 +1,5 @@
 from api.command import Command
+from craftbots.shared_state import SharedWorldView
 
 
 class AgentAPI:
@@ -18,6 +19,8 @@ class AgentAPI:
         self.actors = actors
         self.num_of_current_commands = 0
         self.save_commands=save_commands
+        self.__changes = None
+        self.__shared_state = None
 
     def __send_command(self, function_id, save, *args):
         """
@@ -40,6 +43,32 @@ class AgentAPI:
             return command.id
         return -1
 
+    def submit(self, commands, save=None):
+        """
+        Sends many commands at once, in the same way as calling the function for each of them. This is quicker for
+        agents that send a lot of commands each tick, and for agents in their own process it sends all of the commands
+        to the simulation together.
+
+        :param commands: A list of commands, each a tuple of the ID of the function to be performed (such as
+        Command.MOVE_TO), the ID of the actor, and a tuple of the other arguments in the same order as the function
+        takes them
+        :param save: (optional) if the commands should be saved. Default: None (save_commands is used)
+        :return: A list of the ID of each command in the same order as the commands, with -1 for each command that was
+        not sent because the max_commands limit has been reached, the API does not have access to the actor, or the
+        function does not exist or does not take that many arguments
+        """
+        save = save if save is not None else self.save_commands
+        actors = set(self.actors)
+        command_ids = []
+        for function_id, actor_id, args in commands:
+            if (self.num_of_current_commands < self.__max_commands or self.__max_commands == 0) and \
+                    actors.__contains__(actor_id) and Command.HANDLERS.__contains__((function_id, args.__len__() + 1)):
+                command_ids.append(Command(self.__world, function_id, save, actor_id, *args).id)
+                self.num_of_current_commands += 1
+            else:
+                command_ids.append(-1)
+        return command_ids
+
     def move_to(self, actor_id, node_id, save=None):
         """
         Tell an actor to begin moving to the given node.
@@ -236,6 +265,139 @@ class AgentAPI:
         """
         return self.__world.get_world_info(target_actors=self.actors)
 
+    def get_world_snapshot(self):
+        """
+        This gets the same world as get_world_info, but as plain data that can be kept across ticks, pickled or sent to
+        another process. Lists in the fields are copies, the "completed" field of each task is True or False instead of a
+        function, edges have no "get_other_node" field, and nodes have a "neighbours" field with the ID of the node at
+        the other end of each of their edges. Snapshots can be encoded with craftbots.snapshot.encode.
+
+        :return: The world_info dictionary, as a snapshot
+        """
+        return self.__world.get_world_snapshot(target_actors=self.actors)
+
+    def get_world_delta(self, snapshot=False):
+        """
+        This gets the changes to the world since the last time this was called. The first call gives every entity that
+        can be seen as added. This can be used instead of get_world_info to keep a local copy of world_info up to date, as
+        only the entities that have been added, changed or removed are gathered. See apply_world_delta.
+
+        If the agent has a use_world_delta field set to True, then the simulation will do this for the agent every tick
+        instead of giving it a new world_info.
+
+        :param snapshot: (optional) if the added and changed entities should be given as snapshots, as in
+        get_world_snapshot. Default: False
+        :return: A dictionary with the current tick and the "added", "changed" and "removed" entities. Added and changed
+        entities are given as dictionaries of their fields, and removed entities as lists of ID's, each sorted by the same
+        keys as world_info (actors, nodes, edges, resources, mines, sites, buildings, tasks, commands)
+        """
+        if self.__changes is None:
+            self.__changes = self.__world.track_changes()
+        return self.__world.get_world_delta(self.__changes, target_actors=self.actors, snapshot=snapshot)
+
+    def apply_world_delta(self, world_info, delta):
+        """
+        Updates a world_info dictionary with the changes gathered by get_world_delta.
+
+        :param world_info: The world_info dictionary to be updated
+        :param delta: The changes given by get_world_delta
+        :return: The updated world_info dictionary
+        """
+        world_info["tick"] = delta["tick"]
+        for category in delta["removed"]:
+            for entity_id in delta["removed"][category]:
+                world_info[category].pop(entity_id, None)
+        for category in delta["added"]:
+            world_info[category].update(delta["added"][category])
+        for category in delta["changed"]:
+            world_info[category].update(delta["changed"][category])
+        return world_info
+
+    def get_distance(self, start_node_id, end_node_id):
+        """
+        This instantly returns the length of the shortest path between two nodes. The shortest paths between every pair
+        of nodes are calculated once when the world is created, so this takes the same time no matter how far apart the
+        nodes are.
+
+        This is only available if the graph can be seen in full, so if NODE_PO or EDGE_PO is set then None is returned.
+
+        :param start_node_id: The ID of the node the path starts at
+        :param end_node_id: The ID of the node the path ends at
+        :return: The length of the path, inf if there is no path, or None if either node does not exist
+        """
+        if self.__world.rules["NODE_PO"] or self.__world.rules["EDGE_PO"]:
+            return None
+        return self.__world.get_distance(start_node_id, end_node_id)
+
+    def get_path(self, start_node_id, end_node_id):
+        """
+        This instantly returns the shortest path between two nodes, in time proportional to the length of the path.
+
+        This is only available if the graph can be seen in full, so if NODE_PO or EDGE_PO is set then None is returned.
+
+        :param start_node_id: The ID of the node the path starts at
+        :param end_node_id: The ID of the node the path ends at
+        :return: A list of the ID's of the nodes on the path, including the start and end nodes, or an empty list if
+        there is no path or either node does not exist
+        """
+        if self.__world.rules["NODE_PO"] or self.__world.rules["EDGE_PO"]:
+            return None
+        return self.__world.get_path(start_node_id, end_node_id)
+
+    def get_shortest_paths(self):
+        """
+        This returns the tables that get_distance and get_path use, so that they can be looked up without the world.
+
+        This is only available if the graph can be seen in full, so if NODE_PO or EDGE_PO is set then None is returned.
+
+        :return: A dictionary of the shortest paths between every pair of nodes, as given by World.get_shortest_paths
+        """
+        if self.__world.rules["NODE_PO"] or self.__world.rules["EDGE_PO"]:
+            return None
+        return self.__world.get_shortest_paths()
+
+    def get_shared_state(self):
+        """
+        This returns a read-only view of the actors, mines, sites and resources in shared memory, which is updated at
+        the end of every tick without anything being copied. See SharedWorldView for how to read it.
+
+        This is only available if the SHARED_WORLD_STATE rule is set and none of the partial observability rules are
+        set, otherwise None is returned.
+
+        :return: A SharedWorldView of the world, or None
+        """
+        if self.__shared_state is None:
+            name = self.get_shared_state_name()
+            if name is not None:
+                self.__shared_state = SharedWorldView(name)
+        return self.__shared_state
+
+    def get_shared_state_name(self):
+        """
+        :return: The name of the shared memory that get_shared_state reads from, or None if it is not available
+        """
+        if self.__world.shared_state is None or any(self.__world.rules[rule] for rule in self.__world.PO_RULES):
+            return None
+        return self.__world.shared_state.name
+
+    def get_command(self, command_id):
+        """
+        This instantly returns the fields of a saved command sent to one of the actors of the API, such as its state and
+        result. Unlike get_by_id, this takes the same time no matter how large the world is, so it can be used to poll
+        the outcome of commands each tick.
+
+        Commands are only kept while they are in the command history, as set by the COMMAND_HISTORY_LENGTH and
+        COMMAND_HISTORY_AGE rules.
+
+        :param command_id: The ID of the command, as returned when the command was sent
+        :return: A dictionary of the fields of the command, or None if the command was not saved, has been removed from
+        the history, or was not sent to one of the actors of the API
+        """
+        command = self.__world.entities_by_type["Command"].get(command_id)
+        if command is None or not self.actors.__contains__(command.args[0]):
+            return None
+        return command.fields
+
     def get_by_id(self, entity_id, entity_type=None, target_node=None):
         """
         This command instantly returns the fields of an entity. The fields are stored in a dictionary and are updated
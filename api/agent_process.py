@@ -0,0 +1,299 @@
+import functools
+import multiprocessing
+import traceback
+
+from api.agent_api import AgentAPI
+from craftbots import snapshot
+from craftbots.shared_state import SharedWorldView
+from craftbots.world import World
+
+
+class ProcessAgent:
+
+    # The AgentAPI functions that the agent process can call in the simulation
+    REMOTE_CALLS = ["move_to", "move_rand", "pick_up_resource", "drop_resource", "drop_all_resources", "dig_at",
+                    "start_site", "construct_at", "deposit_resources", "start_looking", "cancel_action",
+                    "start_sending", "start_receiving", "submit", "get_shortest_paths", "get_shared_state_name"]
+
+    def __init__(self, agent_class, api):
+        """
+        Runs an agent in its own process, so that the agent does not share the interpreter with the world, and the world
+        keeps ticking at TICK_HZ no matter how long the agent thinks for. This stands in for the agent in the simulation:
+        each tick the changes to the world are sent to the agent process through a pipe, and the commands the agent
+        sends are performed with the given API until the agent has finished.
+
+        The agent is created in the new process with a RemoteAgentAPI, so agent_class has to be importable from its
+        module.
+
+        :param agent_class: the class constructor for the Agent to be used
+        :param api: the API the agent uses to send commands to the simulation
+        """
+        self.api = api
+        self.thinking = True
+        self.world_info = None
+        self.delta = None
+        self.closed = False
+
+        context = multiprocessing.get_context("spawn")
+        self.connection, agent_connection = context.Pipe()
+        self.process = context.Process(target=run_agent, args=(agent_class, agent_connection, api.actors),
+                                       daemon=True)
+        self.process.start()
+        agent_connection.close()
+
+        # The agent is created with the current world, in the same way it is given each tick
+        self.update_world_info()
+        self.get_next_commands()
+
+    def update_world_info(self):
+        """
+        Gathers the changes to the world since the last tick as snapshots, so that the agent process is given the world
+        as it was at the start of the tick.
+        """
+        self.delta = snapshot.encode(self.api.get_world_delta(snapshot=True))
+
+    def get_next_commands(self):
+        """
+        Sends the changes to the world to the agent process, and performs the calls it makes to the API until it has
+        finished deciding on its commands.
+        """
+        try:
+            self.connection.send_bytes(self.delta)
+            while True:
+                message = self.connection.recv()
+                if message[0] == "done":
+                    break
+                _, function, args, kwargs = message
+                if function in ProcessAgent.REMOTE_CALLS:
+                    self.connection.send(getattr(self.api, function)(*args, **kwargs))
+                else:
+                    self.connection.send(None)
+        except (EOFError, OSError):
+            # The agent process has stopped, so the agent is left thinking and is not called again
+            if not self.closed:
+                print(f"The agent process for actors {self.api.actors} has stopped")
+            return
+        self.thinking = False
+
+    def close(self):
+        """
+        Stops the agent process.
+        """
+        self.closed = True
+        if not self.thinking:
+            try:
+                self.connection.send_bytes(b"")
+            except (EOFError, OSError):
+                pass
+            self.process.join(1)
+        if self.process.is_alive():
+            # The agent is still thinking or did not stop in time, so it is stopped without being able to finish
+            self.process.terminate()
+            self.process.join(1)
+        self.connection.close()
+
+
+class RemoteAgentAPI:
+
+    def __init__(self, connection, actors):
+        """
+        The API given to an agent that runs in its own process. Commands, get_distance and get_path behave as they do
+        in AgentAPI, but are sent to the simulation through the connection. Everything else is answered from the world
+        as it was at the start of the tick, which is kept up to date with the changes sent by the simulation.
+
+        :param connection: the connection to the ProcessAgent in the simulation
+        :param actors: A list of actor ID's that the API can send commands to
+        """
+        self.connection = connection
+        self.actors = actors
+        self.num_of_current_commands = 0
+        self.world_info = {"tick": 0}
+        for category in World.ENTITY_CATEGORIES.values():
+            self.world_info[category] = {}
+        self.shortest_paths = None
+        self.shared_state = None
+
+    def call(self, function, *args, **kwargs):
+        self.connection.send(("call", function, args, kwargs))
+        return self.connection.recv()
+
+    def update(self, delta):
+        """
+        Applies the changes to the world sent by the simulation to world_info, and gives the tasks and edges back the
+        functions that the snapshots replace, so that agents can use world_info as they would in the simulation.
+
+        :param delta: The changes given by AgentAPI.get_world_delta as snapshots
+        """
+        self.apply_world_delta(self.world_info, delta)
+        for changes in [delta["added"], delta["changed"]]:
+            for task in changes["tasks"].values():
+                task["completed"] = functools.partial(task_completed, task["completed"])
+            for edge in changes["edges"].values():
+                edge["get_other_node"] = functools.partial(get_other_node, edge)
+
+    def submit(self, commands, save=None):
+        return self.call("submit", commands, save=save)
+
+    def move_to(self, actor_id, node_id, save=None):
+        return self.call("move_to", actor_id, node_id, save=save)
+
+    def move_rand(self, actor_id, save=None):
+        return self.call("move_rand", actor_id, save=save)
+
+    def pick_up_resource(self, actor_id, resource_id, save=None):
+        return self.call("pick_up_resource", actor_id, resource_id, save=save)
+
+    def drop_resource(self, actor_id, resource_id, save=None):
+        return self.call("drop_resource", actor_id, resource_id, save=save)
+
+    def drop_all_resources(self, actor_id, save=None):
+        return self.call("drop_all_resources", actor_id, save=save)
+
+    def dig_at(self, actor_id, mine_id, save=None):
+        return self.call("dig_at", actor_id, mine_id, save=save)
+
+    def start_site(self, actor_id, site_type, target_task=None, save=None):
+        return self.call("start_site", actor_id, site_type, target_task, save=save)
+
+    def construct_at(self, actor_id, site_id, save=None):
+        return self.call("construct_at", actor_id, site_id, save=save)
+
+    def deposit_resources(self, actor_id, site_id, resource_id, save=None):
+        return self.call("deposit_resources", actor_id, site_id, resource_id, save=save)
+
+    def start_looking(self, actor_id, save=None):
+        return self.call("start_looking", actor_id, save=save)
+
+    def cancel_action(self, actor_id, save=None):
+        return self.call("cancel_action", actor_id, save=save)
+
+    def start_sending(self, actor_id, message, save=None):
+        return self.call("start_sending", actor_id, message, save=save)
+
+    def start_receiving(self, actor_id, save=None):
+        return self.call("start_receiving", actor_id, save=save)
+
+    def get_world_info(self):
+        """
+        :return: A new world_info dictionary, with the world as it was at the start of the tick
+        """
+        world_info = {"tick": self.world_info["tick"]}
+        for category in World.ENTITY_CATEGORIES.values():
+            world_info[category] = self.world_info[category].copy()
+        return world_info
+
+    def apply_world_delta(self, world_info, delta):
+        return AgentAPI.apply_world_delta(self, world_info, delta)
+
+    def get_shortest_paths(self):
+        # The tables do not change, so they are only sent once
+        if self.shortest_paths is None:
+            self.shortest_paths = self.call("get_shortest_paths")
+        return self.shortest_paths
+
+    def get_shared_state(self):
+        # The view reads the shared memory of the simulation directly, so only its name is sent
+        if self.shared_state is None:
+            name = self.call("get_shared_state_name")
+            if name is not None:
+                self.shared_state = SharedWorldView(name)
+        return self.shared_state
+
+    def get_distance(self, start_node_id, end_node_id):
+        shortest_paths = self.get_shortest_paths()
+        return None if shortest_paths is None else World.find_distance(shortest_paths, start_node_id, end_node_id)
+
+    def get_path(self, start_node_id, end_node_id):
+        shortest_paths = self.get_shortest_paths()
+        return None if shortest_paths is None else World.find_path(shortest_paths, start_node_id, end_node_id)
+
+    def get_command(self, command_id):
+        command = self.world_info["commands"].get(command_id)
+        if command is None or not self.actors.__contains__(command["args"][0]):
+            return None
+        return command
+
+    def get_by_id(self, entity_id, entity_type=None, target_node=None):
+        """
+        :param entity_id: The ID of the entity that should be found
+        :param entity_type: (optional) The type of entity to be found
+        (Node, Edge, Actor, Resource, Mine, Site, Building)
+        :param target_node: (optional) the ID of the node that should be checked
+        :return: A dictionary of the fields the entity has, or None if the entity is not found
+        """
+        if entity_type is None:
+            categories = World.ENTITY_CATEGORIES.values()
+        else:
+            categories = [World.ENTITY_CATEGORIES[entity_type]]
+        for category in categories:
+            if self.world_info[category].__contains__(entity_id):
+                fields = self.world_info[category][entity_id]
+                if target_node is None or category == "commands" or self.is_at_node(category, fields, target_node):
+                    return fields
+                return None
+        return None
+
+    def is_at_node(self, category, fields, node_id):
+        node = self.world_info["nodes"].get(node_id)
+        if node is None:
+            return False
+        if category == "nodes":
+            return fields["id"] == node_id
+        if category == "resources":
+            return node["resources"].__contains__(fields["id"]) or node["actors"].__contains__(fields["location"])
+        return node[category].__contains__(fields["id"])
+
+    def get_field(self, entity_id, field, entity_type=None, target_node=None):
+        fields = self.get_by_id(entity_id, entity_type=entity_type, target_node=target_node)
+        return None if fields is None else fields.get(field)
+
+
+def run_agent(agent_class, connection, actors):
+    """
+    Creates the agent and gives it each tick sent by the simulation, until the simulation closes the agent. This is
+    run in the agent process.
+
+    :param agent_class: the class constructor for the Agent to be used
+    :param connection: the connection to the ProcessAgent in the simulation
+    :param actors: A list of actor ID's that the agent can send commands to
+    """
+    api = RemoteAgentAPI(connection, actors)
+    agent = None
+    while True:
+        try:
+            data = connection.recv_bytes()
+        except (EOFError, OSError):
+            return
+        # The simulation sends nothing when the agent should stop
+        if not data:
+            if callable(getattr(agent, "close", None)):
+                agent.close()
+            if api.shared_state is not None:
+                api.shared_state.close()
+            return
+        api.update(snapshot.decode(data))
+        try:
+            if agent is None:
+                agent = agent_class(api, api.get_world_info())
+            else:
+                # As in the simulation, agents are given a new world_info each tick unless they use world deltas
+                if getattr(agent, "use_world_delta", False):
+                    agent.world_info = api.world_info
+                else:
+                    agent.world_info = api.get_world_info()
+                agent.get_next_commands()
+        except Exception:
+            traceback.print_exc()
+        connection.send(("done",))
+
+
+def task_completed(completed):
+    return completed
+
+
+def get_other_node(edge, node_id):
+    if edge["node_a"] == node_id:
+        return edge["node_b"]
+    elif edge["node_b"] == node_id:
+        return edge["node_a"]
+    return None
@@ -19,19 +19,43 @@ class Command:
     REJECTED = 2
     COMPLETED = 3
 
+    # The jump table used to perform commands, keyed by the function ID and the number of arguments. The first argument
+    # is always the ID of the actor. Each entry is the method of the actor that performs the command, the types of entity
+    # that each of the other arguments is the ID of (None if the argument is passed as it is, otherwise the types are
+    # tried in order), and whether the command is rejected if one of those entities cannot be found (otherwise None is
+    # passed)
+    HANDLERS = {
+        (MOVE_TO, 2):               ("travel_to", [("Node",)], True),
+        (MOVE_RAND, 1):             ("travel_rand", [], True),
+        (PICK_UP_RESOURCE, 2):      ("pick_up_resource", [("Resource",)], True),
+        (DROP_RESOURCE, 2):         ("drop_resource", [("Resource",)], True),
+        (DROP_ALL_RESOURCES, 1):    ("drop_everything", [], True),
+        (DIG_AT, 2):                ("dig_at", [("Mine",)], True),
+        (START_SITE, 2):            ("start_site", [None], True),
+        (START_SITE, 3):            ("start_site", [None, ("Task",)], False),
+        (CONSTRUCT_AT, 2):          ("construct_at", [("Site", "Building")], True),
+        (DEPOSIT_RESOURCES, 3):     ("deposit", [("Site", "Building"), ("Resource",)], True),
+        (CANCEL_ACTION, 1):         ("cancel_action", [], True),
+        (START_LOOKING, 1):         ("look", [], True),
+        (START_SENDING, 2):         ("start_sending", [None], True),
+        (START_RECEIVING, 1):       ("start_receiving", [], True)
+    }
+
     def __init__(self, world, function_id, save, *args):
         self.world = world
         self.id = self.world.get_new_id()
-        self.world.command_queue.append(self)
-        self.world.total_commands += 1
         self.function_id = function_id
         self.args = args
         self.result = None
         self.state = Command.PENDING
         self.save = save
+        # The tick the command was performed at
+        self.tick = None
 
         self.fields = {"id": self.id, "function_id": self.function_id, "args": self.args, "result": self.result,
                        "state": self.state}
+        # The command is only queued once it is complete, as the world may perform it straight away on another thread
+        self.world.queue_command(self)
 
     def __str__(self):
         command_names = {self.MOVE_TO : "move_to",
@@ -53,152 +77,48 @@ class Command:
         return self.__str__()
     
     def perform(self):
-        if self.function_id == Command.MOVE_TO and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            target_node = self.world.get_by_id(self.args[1], entity_type="Node")
-            if actor is not None and target_node is not None:
-                self.set_result(actor.travel_to(target_node))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.MOVE_RAND and self.args.__len__() == 1:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.travel_rand())
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.PICK_UP_RESOURCE and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            resource = self.world.get_by_id(self.args[1], entity_type="Resource")
-            if actor is not None and resource is not None:
-                self.set_result(actor.pick_up_resource(resource))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.DROP_RESOURCE and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            resource = self.world.get_by_id(self.args[1], entity_type="Resource")
-            if actor is not None and resource is not None:
-                self.set_result(actor.drop_resource(resource))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.DROP_ALL_RESOURCES and self.args.__len__() == 1:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.drop_everything())
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.DIG_AT and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            mine = self.world.get_by_id(self.args[1], entity_type="Mine")
-            if actor is not None and mine is not None:
-                self.set_result(actor.dig_at(mine))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.START_SITE and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.start_site(self.args[1]))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.START_SITE and self.args.__len__() == 3:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            target_task = self.world.get_by_id(self.args[2], entity_type="Task")
-            if actor is not None:
-                self.set_result(actor.start_site(self.args[1], target_task))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.CONSTRUCT_AT and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            site = self.world.get_by_id(self.args[1], entity_type="Site")
-            if site is None:
-                site = self.world.get_by_id(self.args[1], entity_type="Building")
-            if actor is not None and site is not None:
-                self.set_result(actor.construct_at(site))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.DEPOSIT_RESOURCES and self.args.__len__() == 3:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            site = self.world.get_by_id(self.args[1], entity_type="Site")
-            if site is None:
-                site = self.world.get_by_id(self.args[1], entity_type="Building")
-            resource = self.world.get_by_id(self.args[2], entity_type="Resource")
-            if actor is not None and site is not None and resource is not None:
-                self.set_result(actor.deposit(site, resource))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.CANCEL_ACTION and self.args.__len__() == 1:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.cancel_action())
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.START_LOOKING and self.args.__len__() == 1:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.look())
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.START_SENDING and self.args.__len__() == 2:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.start_sending(self.args[1]))
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        elif self.function_id == Command.START_RECEIVING and self.args.__len__() == 1:
-            self.set_state(Command.ACTIVE)
-            actor = self.world.get_by_id(self.args[0], entity_type="Actor")
-            if actor is not None:
-                self.set_result(actor.start_receiving())
-                self.set_state(Command.COMPLETED)
-                return self.result
-            self.set_state(Command.REJECTED)
-            return False
-        else:
+        """
+        Performs the command with the actor it was sent to. The function and number of arguments are looked up in
+        Command.HANDLERS, and the ID's in the arguments are resolved to entities, so the command is rejected if it is
+        not a known function or an entity it needs cannot be found.
+
+        :return: The result of the command, or False if it was rejected
+        """
+        self.tick = self.world.tick
+        handler = Command.HANDLERS.get((self.function_id, self.args.__len__()))
+        if handler is None:
             self.set_state(Command.REJECTED)
             return False
+        self.set_state(Command.ACTIVE)
+        method, arg_types, required = handler
+        entities = self.world.entities_by_type
+        actor = entities["Actor"].get(self.args[0])
+        args = []
+        for arg, types in zip(self.args[1:], arg_types):
+            if types is None:
+                args.append(arg)
+                continue
+            entity = None
+            for entity_type in types:
+                entity = entities[entity_type].get(arg)
+                if entity is not None:
+                    break
+            if entity is None and required:
+                actor = None
+            args.append(entity)
+        if actor is not None:
+            self.set_result(getattr(actor, method)(*args))
+            self.set_state(Command.COMPLETED)
+            return self.result
+        self.set_state(Command.REJECTED)
+        return False
 
     def set_result(self, result):
         self.result = result
         self.fields.__setitem__("result", result)
+        self.world.mark_changed(self)
         
     def set_state(self, state):
         self.state = state
         self.fields.__setitem__("state", state)
+        self.world.mark_changed(self)
@@ -0,0 +1,75 @@
+import heapq
+
+
+class PriorityQueue:
+
+    def __init__(self):
+        """
+        A priority queue for search frontiers, where the item with the smallest priority is popped first. Items with the
+        same priority are popped in the order they were first pushed.
+
+        An item can be pushed with a key, such as the ID of the node a path leads to. Pushing another item with the same
+        key replaces it, which is used to lower the priority of a node when a shorter path to it is found. The replaced
+        entry is left in the heap and skipped when it reaches the top (lazy deletion), so pushing and popping are both
+        O(log n).
+        """
+        self.heap = []
+        self.entries = {}
+        self.size = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __contains__(self, key):
+        return self.entries.__contains__(key)
+
+    def push(self, item, priority, key=None):
+        """
+        Adds an item to the queue, replacing the item with the same key if there is one.
+
+        :param item: the item to be added
+        :param priority: the priority of the item. Smaller priorities are popped first
+        :param key: (optional) a hashable key that identifies the item. Default: None (the item is always added as a new
+        entry, and cannot be replaced)
+        """
+        order = self.count
+        if key is not None and self.entries.__contains__(key):
+            # The replaced entry is skipped once popped, and the new entry keeps its place amongst equal priorities
+            old_entry = self.entries[key]
+            old_entry[5] = False
+            order = old_entry[1]
+        else:
+            self.size += 1
+        # Entries are compared by priority, then order, then the count, which is unique, so items are never compared
+        entry = [priority, order, self.count, key, item, True]
+        self.count += 1
+        if key is not None:
+            self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+
+    def pop(self):
+        """
+        Removes the item with the smallest priority from the queue.
+
+        :return: A tuple of the item and its priority
+        """
+        while self.heap:
+            priority, _, _, key, item, valid = heapq.heappop(self.heap)
+            if valid:
+                if key is not None:
+                    self.entries.pop(key)
+                self.size -= 1
+                return item, priority
+        raise IndexError("pop from an empty priority queue")
+
+    def get(self, key):
+        """
+        :param key: the key of the item
+        :return: A tuple of the item with the key and its priority, or None if there is no item with the key in the queue
+        """
+        entry = self.entries.get(key)
+        return None if entry is None else (entry[4], entry[0])
@@ -1,72 +1,67 @@
-import sys
-
 from craftbots.world import World
 from api.agent_api import AgentAPI
+from api.agent_process import ProcessAgent
+from craftbots.tick_scheduler import TickScheduler
+from craftbots.shared_state import SharedWorldState
 from agents.blank_agent import BlankAgent
 import craftbots.view as view
 import threading
-import random as r
 import math
 import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from entities.building import Building
 
 PADDING = 25
 NODE_SIZE = 20
 
-simulation_stop = None
-sim_stopped = False
-gui_updating = False
-root = None
-world = World()
-start_time = None
-ticks_run_this_second = 0
-refresh = False
-results = []
-gui_initialised = False
-gui = None
-kill_switch = False
-
-
-def default_scenario(modifiers, world_gen_modifiers):
-    global world
+
+def default_scenario(modifiers, world_gen_modifiers, scenario_world):
+    """
+    Places the actors, resources, mines, buildings and sites in the world as described by the modifiers.
+
+    :param modifiers: the modifiers of the simulation
+    :param world_gen_modifiers: the world generation modifiers of the simulation
+    :param scenario_world: the world to create the scenario in
+    """
     for _ in range(modifiers["NUM_OF_ACTORS"]):
-        actor = world.add_actor(world.nodes[r.randint(0, world.nodes.__len__() - 1)])
+        actor = scenario_world.add_actor(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)])
         for _ in range(world_gen_modifiers["ACTOR_NUM_OF_RED_RESOURCES"]):
-            world.add_resource(actor, 0)
+            scenario_world.add_resource(actor, 0)
         for _ in range(world_gen_modifiers["ACTOR_NUM_OF_BLUE_RESOURCES"]):
-            world.add_resource(actor, 1)
+            scenario_world.add_resource(actor, 1)
         for _ in range(world_gen_modifiers["ACTOR_NUM_OF_ORANGE_RESOURCES"]):
-            world.add_resource(actor, 2)
+            scenario_world.add_resource(actor, 2)
         for _ in range(world_gen_modifiers["ACTOR_NUM_OF_BLACK_RESOURCES"]):
-            world.add_resource(actor, 3)
+            scenario_world.add_resource(actor, 3)
         for _ in range(world_gen_modifiers["ACTOR_NUM_OF_GREEN_RESOURCES"]):
-            world.add_resource(actor, 4)
+            scenario_world.add_resource(actor, 4)
         
     for _ in range(world_gen_modifiers["NUM_OF_RED_RESOURCES"]):
-        world.add_resource(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 0)
+        scenario_world.add_resource(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 0)
     for _ in range(world_gen_modifiers["NUM_OF_RED_MINES"]):
-        world.add_mine(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 0)
+        scenario_world.add_mine(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 0)
 
     for _ in range(world_gen_modifiers["NUM_OF_BLUE_RESOURCES"]):
-        world.add_resource(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 1)
+        scenario_world.add_resource(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 1)
     for _ in range(world_gen_modifiers["NUM_OF_BLUE_MINES"]):
-        world.add_mine(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 1)
+        scenario_world.add_mine(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 1)
         
     for _ in range(world_gen_modifiers["NUM_OF_ORANGE_RESOURCES"]):
-        world.add_resource(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 2)
+        scenario_world.add_resource(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 2)
     for _ in range(world_gen_modifiers["NUM_OF_ORANGE_MINES"]):
-        world.add_mine(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 2)
+        scenario_world.add_mine(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 2)
 
     for _ in range(world_gen_modifiers["NUM_OF_BLACK_RESOURCES"]):
-        world.add_resource(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 3)
+        scenario_world.add_resource(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 3)
     for _ in range(world_gen_modifiers["NUM_OF_BLACK_MINES"]):
-        world.add_mine(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 3)
+        scenario_world.add_mine(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 3)
 
     for _ in range(world_gen_modifiers["NUM_OF_GREEN_RESOURCES"]):
-        world.add_resource(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 4)
+        scenario_world.add_resource(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 4)
     for _ in range(world_gen_modifiers["NUM_OF_GREEN_MINES"]):
-        world.add_mine(world.nodes[r.randint(0, world.nodes.__len__() - 1)], 4)
+        scenario_world.add_mine(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], 4)
 
     for key in world_gen_modifiers:
 
@@ -75,14 +70,15 @@ def default_scenario(modifiers, world_gen_modifiers):
             for _ in range(world_gen_modifiers[key]):
                 building_type_name = key[4:] # removes "NUM_"
                 building_type = Building.__dict__[building_type_name]
-                world.add_building(world.nodes[r.randint(0, world.nodes.__len__() - 1)], building_type)
+                scenario_world.add_building(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], building_type)
 
         # initial sites
         if key.startswith("NUM_SITE"):
             for _ in range(world_gen_modifiers[key]):
                 building_type_name = "BUILDING" + key[9:] # removes "NUM_SITE_"
                 building_type = Building.__dict__[building_type_name]
-                world.add_site(world.nodes[r.randint(0, world.nodes.__len__() - 1)], building_type)
+                scenario_world.add_site(scenario_world.nodes[scenario_world.random.randint(0, scenario_world.nodes.__len__() - 1)], building_type)
+
 
 
 def start_simulation(agent_class=BlankAgent, use_gui=True, scenario=default_scenario,modifier_file=None,world_modifier_file=None,rule_file=None, refresh_sim_on_end=False, seed = None):
@@ -96,211 +92,386 @@ def start_simulation(agent_class=BlankAgent, use_gui=True, scenario=default_scen
         :param modifier_file: (optional) path to the text file that is used to initialise the modifiers for the simulation. Default: None (the default parameters are used)
         :param world_modifier_file: (optional) path to the text file that is used to initialise the world parameters for the simulation. Default: None (the default parameters are used)
         :param rule_file: (optional) path to the text file that is used to set the rules for the simulation.  Default: None (the default parameters are used)
-        :return:
+        :param refresh_sim_on_end: (optional) if a new simulation should be started in the same window whenever one ends, until the window is closed. Default: False
+        :param seed: (optional) the random seed for the world. Default: None (the seed from the world modifiers is used)
+        :return: The results of the simulation, or a list of the results of each simulation if refresh_sim_on_end is set
         """
-    global ticks_run_this_second, sim_stopped, refresh, root, start_time
     if refresh_sim_on_end:
-        while not kill_switch:
-            sim_thread = threading.Thread(target=prep_simulation, args=(
-                agent_class, use_gui, scenario, modifier_file, world_modifier_file, rule_file, seed), daemon=True)
-            sim_thread.start()
-            sim_stopped = False
-            refresh = True
-            while not sim_stopped:
-                time.sleep(1) # Wait for the simulation to stop
-                root.wm_attributes("-topmost", 1)
-                root.focus_force()
+        results = []
+        gui = None
+        while True:
+            simulation = Simulation(agent_class, use_gui, scenario, modifier_file, world_modifier_file, rule_file, seed,
+                                    gui=gui, keep_gui=True)
+            threading.Thread(target=simulation.start, daemon=True).start()
+            while not simulation.stopped.wait(1):  # Wait for the simulation to stop
+                if simulation.root is not None:
+                    simulation.root.wm_attributes("-topmost", 1)
+                    simulation.root.focus_force()
+            results.append(simulation.results)
             print(f"Current results: {results}")
-        return results
+            if simulation.killed:
+                return results
+            gui = simulation.gui
     else:
-        start_time = time.perf_counter()
-        sim_thread = threading.Thread(target=prep_simulation, args=(agent_class, use_gui, scenario, modifier_file, world_modifier_file, rule_file, seed), daemon=True)
-        sim_thread.start()
-        sim_stopped = False
-        while not sim_stopped:
-            time.sleep(1)
-
-            # sys.stdout.write(f"\rTick rate: {ticks_run_this_second}")
-            # sys.stdout.flush()
-            ticks_run_this_second = 0
-        return get_results()
-
-
-def prep_simulation(agent_class, use_gui, scenario, modifier_file, world_modifier_file, rule_file, seed):
-    global world, view, gui, gui_initialised
-    world_gen_modifiers = get_world_gen_modifiers(world_modifier_file)
-    modifiers = get_modifiers(modifier_file)
-    rules = get_rules(rule_file)
-    if seed is not None:
-        world_gen_modifiers["RANDOM_SEED"] = seed
-    world = World(modifiers, world_gen_modifiers, rules)
-    scenario(modifiers, world_gen_modifiers)
-
-    if rules["LIMITED_COMMUNICATIONS"]:
-        agents = []
-        for actor in world.actors:
-            api = AgentAPI(world, [actor.id])
-            new_agent = agent_class(api, api.get_world_info())
-            agents.append(new_agent)
-    else:
-        actor_ids = []
-        for actor in world.actors:
-            actor_ids.append(actor.id)
-        api = AgentAPI(world, actor_ids)
-        agents = [agent_class(api, api.get_world_info())]
+        return Simulation(agent_class, use_gui, scenario, modifier_file, world_modifier_file, rule_file, seed).run()
 
-    if rules["RT_OR_LOCK_STEP"] == 0:
-        global simulation_stop
-        simulation_stop = call_repeatedly(1 / rules["TICK_HZ"], refresh_world, agents)
 
-        if use_gui:
-            gui = init_gui()
-            refresh_gui(gui, rules["TICK_HZ"])
-            gui.mainloop()
+def run_headless(agent_class, config=None, seed=None, scenario=default_scenario):
+    """
+    Runs a simulation to completion on the current thread, without a GUI, threads or waiting. The world is ticked as
+    fast as the agent allows, in lock step with the agent, and time is always measured in ticks (SIM_LENGTH * TICK_HZ)
+    no matter what TIME_LENGTH_TYPE and RT_OR_LOCK_STEP are set to. Nothing is shared with other simulations through the
+    module, so this is suitable for batch evaluations.
+
+    :param agent_class: the class constructor for the Agent to be used
+    :param config: (optional) a dictionary with any of the paths "modifier_file", "world_modifier_file" and "rule_file"
+    used to initialise the simulation, as in start_simulation. Default: None (the default parameters are used)
+    :param seed: (optional) the random seed for the world. Default: None (the seed from the world modifiers is used)
+    :param scenario: (optional) the scenario to be created in the world. This is called with the modifiers, world
+    modifiers and the world. Default: default_scenario
+    :return: The results of the simulation, as given by Simulation.get_results
+    """
+    if config is None:
+        config = {}
+    return Simulation(agent_class, False, scenario, config.get("modifier_file"), config.get("world_modifier_file"),
+                      config.get("rule_file"), seed).run_headless()
 
-    else:
-        if use_gui:
-            if not gui_initialised: gui = init_gui()
-            else: gui.world = world
-            gui.draw_world()
-            sim_thread = threading.Thread(target=lock_step_sim, args=(agents, gui.update_model))
-            sim_thread.start()
-            if not gui_initialised:
-                gui_initialised = True
-                gui.mainloop()
 
-        else:
-            sim_thread = threading.Thread(target=lock_step_sim, args=(agents, None))
-            sim_thread.start()
+class Simulation:
+
+    def __init__(self, agent_class=BlankAgent, use_gui=False, scenario=default_scenario, modifier_file=None,
+                 world_modifier_file=None, rule_file=None, seed=None, gui=None, keep_gui=False):
+        """
+        A single CraftBots simulation. The simulation owns its world, agents, clock and results, so any number of
+        simulations can be run independently in the same process, either on separate threads or one after another.
+
+        :param agent_class: (optional) the class constructor for the Agent to be used. Default: BlankAgent
+        :param use_gui: (optional) if the GUI should be displayed. Default: False
+        :param scenario: (optional) the scenario to be created in the world. This is called with the modifiers, world
+        modifiers and the world. Default: default_scenario
+        :param modifier_file: (optional) path to the modifiers file. Default: None (the default parameters are used)
+        :param world_modifier_file: (optional) path to the world modifiers file. Default: None (the default parameters
+        are used)
+        :param rule_file: (optional) path to the rules file. Default: None (the default parameters are used)
+        :param seed: (optional) the random seed for the world. Default: None (the seed from the world modifiers is used)
+        :param gui: (optional) a GUI from a previous simulation to draw this simulation in, instead of opening a new window
+        :param keep_gui: (optional) if the GUI should be left open when the simulation ends, so that it can be used by
+        another simulation. Default: False
+        """
+        self.agent_class = agent_class
+        self.use_gui = use_gui
+        self.scenario = scenario
+        self.modifier_file = modifier_file
+        self.world_modifier_file = world_modifier_file
+        self.rule_file = rule_file
+        self.seed = seed
+
+        self.world = World()
+        self.agents = []
+        self.agent_pool = None
+        self.missed_ticks = []
+        self.start_time = None
+        self.results = None
+        self.stopped = threading.Event()
+        self.close_lock = threading.Lock()
+        self.scheduler = None
+        self.killed = False
+
+        self.gui = gui
+        self.root = None if gui is None else gui.master
+        self.keep_gui = keep_gui
+
+    def prepare(self):
+        """
+        Creates the world from the initialisation files, places the scenario in it, and creates the agents.
+        """
+        world_gen_modifiers = get_world_gen_modifiers(self.world_modifier_file)
+        modifiers = get_modifiers(self.modifier_file)
+        rules = get_rules(self.rule_file)
+        if self.seed is not None:
+            world_gen_modifiers["RANDOM_SEED"] = self.seed
+        self.world = World(modifiers, world_gen_modifiers, rules)
+        self.scenario(modifiers, world_gen_modifiers, self.world)
+        if self.world.rules["SHARED_WORLD_STATE"]:
+            self.world.shared_state = SharedWorldState(self.world)
+        self.agents = create_agents(self.world, self.agent_class)
+        self.missed_ticks = [0 for _ in self.agents]
+
+    def run(self):
+        """
+        Runs the simulation on a separate thread, and waits on the current thread for the simulation to finish.
+
+        :return: The results of the simulation
+        """
+        self.start_time = time.perf_counter()
+        threading.Thread(target=self.start, daemon=True).start()
+        self.stopped.wait()
+        return self.results
+
+    def run_headless(self):
+        """
+        Runs the simulation to completion on the current thread, in lock step with the agents and as fast as possible.
+        Time is always measured in ticks.
 
+        :return: The results of the simulation
+        """
+        self.start_time = time.perf_counter()
+        self.prepare()
+        # The simulation is closed even if the world or an agent raises an exception, so that the agent processes and
+        # shared memory are not left behind
+        try:
+            while True:
+                self.step()
+                if self.tasks_finished() or self.time_up(simulated_time=True):
+                    break
+        finally:
+            self.on_close()
+        return self.results
+
+    def start(self):
+        """
+        Prepares the simulation and starts running it in real time or lock step, as set by the rules. If the GUI is used
+        then this does not return until the GUI is closed.
+        """
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        self.prepare()
+
+        if self.world.rules["RT_OR_LOCK_STEP"] == 0:
+            self.agent_pool = ThreadPoolExecutor(max_workers=self.world.rules["AGENT_WORKERS"] or len(self.agents),
+                                                 thread_name_prefix="agent")
+            self.scheduler = TickScheduler(1 / self.world.rules["TICK_HZ"], self.refresh_world,
+                                           catch_up=self.world.rules["TICK_CATCH_UP"], on_stop=self.on_close)
+            self.scheduler.start()
+
+            if self.use_gui:
+                new_gui = self.gui is None
+                self.init_gui()
+                self.refresh_gui()
+                if new_gui:
+                    self.gui.mainloop()
 
-def lock_step_sim(agents, update_model):
-    global world, ticks_run_this_second
-    while not sim_stopped:
-        for agent in agents:
-            agent.world_info = agent.api.get_world_info()
+        else:
+            if self.use_gui:
+                new_gui = self.gui is None
+                self.init_gui()
+                self.gui.draw_world()
+                threading.Thread(target=self.lock_step_sim, args=(self.gui.update_model,)).start()
+                if new_gui:
+                    self.gui.mainloop()
+            else:
+                threading.Thread(target=self.lock_step_sim, args=(None,)).start()
+
+    def step(self):
+        """
+        Runs a single tick in lock step: every agent is given an up to date world_info and decides on its commands, and
+        then the world is ticked.
+        """
+        for agent in self.agents:
+            update_world_info(agent)
             agent.get_next_commands()
 
+        self.world.run_tick()
 
-        #time.sleep(1 / world.rules["LOCK_STEP_RATE"])
-        world.run_tick()
-        ticks_run_this_second += 1
+        for agent in self.agents:
+            agent.api.num_of_current_commands = 0
 
-        for agent in agents:
+    def lock_step_sim(self, update_model):
+        try:
+            while not self.stopped.is_set():
+                self.step()
+
+                if self.tasks_finished() or self.time_up():
+                    break
+
+                if update_model is not None:
+                    update_model()
+        finally:
+            self.on_close()
+
+    def refresh_world(self):
+        for index, agent in enumerate(self.agents):
+            if not agent.thinking:
+                agent.thinking = True
+                update_world_info(agent)
+                self.agent_pool.submit(agent.get_next_commands).add_done_callback(report_agent_error)
+            else:
+                self.missed_ticks[index] += 1
+        self.world.run_tick()
+        for agent in self.agents:
             agent.api.num_of_current_commands = 0
+        # The simulation is closed by the scheduler once it has stopped, so that this tick is included in its metrics
+        if self.time_up():
+            self.scheduler.stop()
+
+    def tasks_finished(self):
+        """
+        :return: True if every task is complete and no more tasks can be created, and False otherwise
+        """
+        return self.world.world_gen_modifiers["REFRESH_TASKS"] == 0 and self.world.modifiers["NEW_TASK_CHANCE"] == 0 \
+            and self.world.tasks_complete()
+
+    def time_up(self, simulated_time=False):
+        """
+        :param simulated_time: (optional) if time should be measured in ticks, no matter what TIME_LENGTH_TYPE is set to
+        :return: True if the simulation has run for SIM_LENGTH, and False otherwise
+        """
+        if self.world.rules["TIME_LENGTH_TYPE"] == 0 and not simulated_time:
+            return time.perf_counter() - self.world.rules["SIM_LENGTH"] >= self.start_time
+        return self.world.tick >= self.world.rules["SIM_LENGTH"] * self.world.rules["TICK_HZ"]
 
+    def refresh_gui(self):
 
-        if world.world_gen_modifiers["REFRESH_TASKS"] == 0 and world.modifiers["NEW_TASK_CHANCE"] == 0 and world.tasks_complete():
-            return on_close()
+        def refresh_gui_wrapper():
+            if not self.stopped.is_set():
+                self.gui.update_model()
+                self.refresh_gui()
 
-        if world.rules["TIME_LENGTH_TYPE"] == 0:
-            if time.time() - world.rules["SIM_LENGTH"] >= start_time:
-                return on_close()
+        self.gui.after(math.ceil(1000 / self.world.rules["TICK_HZ"]), refresh_gui_wrapper)
+
+    def get_results(self):
+        """
+        :return: The results of the simulation, as given by get_world_results, with the number of ticks each agent missed
+        because it was still deciding on its commands. In real time, the rate the world was ticked at is also given as
+        tick_metrics (see TickScheduler.get_metrics)
+        """
+        results = get_world_results(self.world, time.perf_counter() - self.start_time)
+        results["missed_ticks"] = self.missed_ticks[:]
+        if self.scheduler is not None:
+            results["tick_metrics"] = self.scheduler.get_metrics()
+        return results
+
+    def init_gui(self):
+        if self.gui is not None:
+            self.gui.world = self.world
         else:
-            if world.tick >= world.rules["SIM_LENGTH"] * world.rules["TICK_HZ"]:
-                return on_close()
-
-        if update_model is not None:
-            update_model()
-
-
-def refresh_gui(gui, tick_hz):
-
-    def refresh_gui_wrapper():
-        if not sim_stopped:
-            global gui_updating
-            gui_updating = True
-            gui.update_model()
-            gui_updating = False
-            refresh_gui(gui, tick_hz)
-
-    gui.after(math.ceil(1000 / tick_hz), refresh_gui_wrapper)
-
-
-def refresh_world(agents):
-    global world, ticks_run_this_second
-    for agent in agents:
-        if not agent.thinking:
-            agent.thinking = True
-            agent.world_info = agent.api.get_world_info()
-            agent_thread = threading.Thread(target=agent.get_next_commands)
-            agent_thread.start()
-    world.run_tick()
-    ticks_run_this_second += 1
-    for agent in agents:
-        agent.api.num_of_current_commands = 0
-    if world.rules["TIME_LENGTH_TYPE"] == 0:
-        if time.time() - world.rules["SIM_LENGTH"] >= start_time:
-            return on_close()
+            self.root = view.tk.Tk()
+
+            width = self.world.world_gen_modifiers["WIDTH"]
+            height = self.world.world_gen_modifiers["HEIGHT"]
+            self.root.title("CraftBots")
+            self.root.geometry(str(width + PADDING * 2) + "x" + str(height + PADDING * 2))
+            self.gui = view.GUI(self.world, width=width, height=height, padding=PADDING, node_size=NODE_SIZE,
+                                master=self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.kill_gui)
+
+    def on_close(self):
+        """
+        Stops the simulation and records its results. The GUI is closed unless keep_gui is set. In real time this can be
+        called from any thread, and waits for the tick in progress to finish before anything is closed.
+
+        :return: The results of the simulation
+        """
+        with self.close_lock:
+            if self.stopped.is_set():
+                return self.results
+            print("\nSimulation time up")
+            if self.scheduler is not None:
+                self.scheduler.stop()
+                if threading.current_thread() is not self.scheduler.thread:
+                    # The scheduler calls this once it has stopped as well, which waits on the lock until this is done
+                    self.scheduler.wait()
+            if self.agent_pool is not None:
+                self.agent_pool.shutdown(wait=False, cancel_futures=True)
+            # Agents that hold on to threads or processes, such as agents in their own process, stop them in close
+            for agent in self.agents:
+                if callable(getattr(agent, "close", None)):
+                    agent.close()
+            if self.world.shared_state is not None:
+                self.world.shared_state.close()
+                self.world.shared_state = None
+            self.results = self.get_results()
+            self.stopped.set()
+        # The GUI is closed without the lock, as Tk may need the GUI thread, which could be waiting on the lock
+        if self.root is not None and not (self.keep_gui and not self.killed):
+            try:
+                self.root.destroy()
+            except Exception:
+                pass
+        return self.results
+
+    def kill_gui(self):
+        self.killed = True
+        self.on_close()
+
+
+def create_agents(sim_world, agent_class):
+    """
+    Creates the agents for a world. If the simulation has limited communications then each actor gets its own agent,
+    otherwise one agent controls all of the actors. If AGENT_PROCESSES is set then each agent runs in its own process.
+
+    :param sim_world: the world the agents should control
+    :param agent_class: the class constructor for the Agent to be used
+    :return: A list of the agents
+    """
+    if sim_world.rules["LIMITED_COMMUNICATIONS"]:
+        agents = []
+        for actor in sim_world.actors:
+            api = AgentAPI(sim_world, [actor.id])
+            agents.append(create_agent(sim_world, agent_class, api))
     else:
-        if world.tick >= world.rules["SIM_LENGTH"] * world.rules["TICK_HZ"]:
-            return on_close()
-
-
-def call_repeatedly(interval, func, *args):
-    stopped = threading.Event()
-
-    def loop():
-        while not stopped.wait(interval):  # the first call is in `interval` secs
-            func(*args)
-    threading.Thread(target=loop, daemon=True).start()
-    return stopped.set
-
-
-def get_results():
-    global start_time
-    total_time = time.perf_counter() - start_time
-    return {"seed": world.seed,
-            "score": world.total_score,
-            "potential_score": sum(list(map(lambda task: task.get_score(), world.tasks))),
-            "commands_sent": world.total_commands,
-            "failures": world.failures,
-            "tasks_completed": len(list(filter(lambda task: task.completed(), world.tasks))),
-            "remaining_sites": len(world.sites),
-            "remaining_resources": len(world.resources),
-            "actor_idle_time": world.actor_idle_time,
-            "ticks": world.tick,
-            "time_to_run": total_time,
+        actor_ids = []
+        for actor in sim_world.actors:
+            actor_ids.append(actor.id)
+        api = AgentAPI(sim_world, actor_ids)
+        agents = [create_agent(sim_world, agent_class, api)]
+    return agents
 
-            }
 
+def create_agent(sim_world, agent_class, api):
+    if sim_world.rules["AGENT_PROCESSES"]:
+        return ProcessAgent(agent_class, api)
+    return agent_class(api, api.get_world_info())
 
-def init_gui():
-    global root, world, gui
-    if gui_initialised: return gui
-    root = view.tk.Tk()
-
-    width = world.world_gen_modifiers["WIDTH"]
-    height = world.world_gen_modifiers["HEIGHT"]
-    root.title("CraftBots")
-    root.protocol("WM_DELETE_WINDOW", kill_gui)
-    root.geometry(str(width + PADDING * 2) + "x" + str(height + PADDING * 2))
-    return view.GUI(world, width=width, height=height, padding=PADDING, node_size=NODE_SIZE, master=root)
-
-
-def on_close():
-    global world
-    print("\nSimulation time up")
-    global sim_stopped, simulation_stop, refresh, results
-    if simulation_stop is not None:
-        simulation_stop()
-    sim_stopped = True
-    if refresh:
-        results.append(get_results())
-        return
-    if root is not None:
-        try:
-            root.destroy()
-        except:
-            return on_close()
-    return world.total_score
 
+def update_world_info(agent):
+    """
+    Gives the agent an up to date world_info. If the agent has set use_world_delta then only the changes since the last
+    tick are applied to its current world_info, otherwise it is given a new world_info. Agents in their own process are
+    sent the changes since the last tick when they are next called.
+
+    :param agent: the agent to be updated
+    """
+    if isinstance(agent, ProcessAgent):
+        agent.update_world_info()
+    elif getattr(agent, "use_world_delta", False) and agent.world_info is not None:
+        agent.api.apply_world_delta(agent.world_info, agent.api.get_world_delta())
+    else:
+        agent.world_info = agent.api.get_world_info()
+
+
+def report_agent_error(future):
+    """
+    Prints the error raised by an agent that was called by the agent pool, as a thread would have done.
 
-def kill_gui():
-    global kill_switch
-    kill_switch = True
-    on_close()
-    root.destroy()
+    :param future: the future of the call to the agent
+    """
+    if not future.cancelled() and future.exception() is not None:
+        error = future.exception()
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+
+def get_world_results(result_world, total_time):
+    """
+    Gathers the results of a simulation from its world.
+
+    :param result_world: the world the simulation was run in
+    :param total_time: the time in seconds the simulation took to run
+    :return: A dictionary of the results
+    """
+    return {"seed": result_world.seed,
+            "score": result_world.total_score,
+            "potential_score": sum(list(map(lambda task: task.get_score(), result_world.tasks))),
+            "commands_sent": result_world.total_commands,
+            "failures": result_world.failures,
+            "tasks_completed": len(list(filter(lambda task: task.completed(), result_world.tasks))),
+            "remaining_sites": len(result_world.sites),
+            "remaining_resources": len(result_world.resources),
+            "actor_idle_time": result_world.get_actor_idle_time(),
+            "ticks": result_world.tick,
+            "time_to_run": total_time,
+
+            }
 
 
 def get_world_gen_modifiers(modifier_file):
@@ -0,0 +1,245 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# The columns of each table: the name of the column, the field of the entity it mirrors and its type. Columns with a
+# fourth value hold a list field of that length
+TABLES = {"actors": [("id", "id", np.int64), ("node", "node", np.int64), ("state", "state", np.int64),
+                     ("progress", "progress", np.float64), ("inventory", "resources", np.int64)],
+          "mines": [("id", "id", np.int64), ("node", "node", np.int64), ("colour", "colour", np.int64),
+                    ("progress", "progress", np.float64)],
+          "sites": [("id", "id", np.int64), ("node", "node", np.int64), ("building_type", "building_type", np.int64),
+                    ("progress", "progress", np.float64), ("needed_resources", "needed_resources", np.int64, 5),
+                    ("deposited_resources", "deposited_resources", np.int64, 5)],
+          "resources": [("id", "id", np.int64), ("location", "location", np.int64), ("colour", "colour", np.int64)]}
+
+ENTITY_TABLES = {"Actor": "actors", "Mine": "mines", "Site": "sites", "Resource": "resources"}
+
+# The header holds the sequence number, the generation of the data block, the tick, and then the number of rows and the
+# capacity of each table
+HEADER_SEQUENCE = 0
+HEADER_GENERATION = 1
+HEADER_TICK = 2
+HEADER_SIZE = 3 + 2 * TABLES.__len__()
+
+
+def get_layout(capacities):
+    """
+    :param capacities: the number of rows each table has room for, by the name of the table
+    :return: A list of the table, column name, offset in bytes, shape and type of each column in the data block, and the
+    size of the data block in bytes
+    """
+    layout = []
+    offset = 0
+    for table, columns in TABLES.items():
+        for column in columns:
+            shape = (capacities[table],) if column.__len__() == 3 else (capacities[table], column[3])
+            layout.append((table, column[0], offset, shape, column[2]))
+            offset += int(np.prod(shape)) * np.dtype(column[2]).itemsize
+    return layout, max(offset, 1)
+
+
+def get_columns(buffer, capacities, writeable):
+    columns = {table: {} for table in TABLES}
+    layout, _ = get_layout(capacities)
+    for table, column, offset, shape, dtype in layout:
+        array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        array.flags.writeable = writeable
+        columns[table][column] = array
+    return columns
+
+
+class SharedWorldState:
+
+    def __init__(self, world, name=None, capacity=64):
+        """
+        A structure of arrays mirror of the actors, mines, sites and resources of a world in shared memory, so that any
+        number of processes can read the state of the world with SharedWorldView without it being pickled. Each table
+        has one array per column, and one row per entity. Rows are not kept in any order, as removed entities are
+        replaced by the last row of their table.
+
+        Only the entities that have changed are written by update, which the world calls at the end of every tick. When
+        a table runs out of room, a new data block with twice the room is made and the generation in the header is
+        increased, so that readers know to attach to the new block.
+
+        :param world: the world to mirror
+        :param name: (optional) the name of the shared memory header. Default: None (a unique name is chosen)
+        :param capacity: (optional) the number of rows each table has room for at first. Default: 64
+        """
+        self.world = world
+        self.changes = world.track_changes()
+        self.rows = {table: {} for table in TABLES}
+        self.row_ids = {table: [] for table in TABLES}
+        self.capacities = {table: capacity for table in TABLES}
+        for table in TABLES:
+            entity_type = [entity_type for entity_type in ENTITY_TABLES if ENTITY_TABLES[entity_type] == table][0]
+            while self.capacities[table] < world.entities_by_type[entity_type].__len__():
+                self.capacities[table] *= 2
+
+        self.header_memory = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE * 8)
+        self.name = self.header_memory.name
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.header_memory.buf)
+        self.header[:] = 0
+        self.generation = -1
+        self.data_memory = None
+        self.columns = None
+        self.create_data_block()
+
+        self.header[HEADER_SEQUENCE] += 1
+        for entity_type, table in ENTITY_TABLES.items():
+            for entity in world.entities_by_type[entity_type].values():
+                self.write_row(table, entity)
+        self.write_counts()
+        self.header[HEADER_SEQUENCE] += 1
+
+    def create_data_block(self):
+        """
+        Makes a new data block with the current capacities, copies the rows of the old data block into it, and then
+        removes the old data block.
+        """
+        old_memory, old_columns = self.data_memory, self.columns
+        self.generation += 1
+        _, size = get_layout(self.capacities)
+        self.data_memory = shared_memory.SharedMemory(name=f"{self.name}_{self.generation}", create=True, size=size)
+        self.columns = get_columns(self.data_memory.buf, self.capacities, True)
+        if old_memory is not None:
+            for table in TABLES:
+                count = self.row_ids[table].__len__()
+                for column in self.columns[table]:
+                    self.columns[table][column][:count] = old_columns[table][column][:count]
+            del old_columns
+            old_memory.close()
+            old_memory.unlink()
+        self.header[HEADER_GENERATION] = self.generation
+        for index, table in enumerate(TABLES):
+            self.header[3 + TABLES.__len__() + index] = self.capacities[table]
+
+    def update(self):
+        """
+        Writes the entities that have been added, changed or removed since the last update. Readers can tell that the
+        tables are being written to as the sequence number in the header is odd until the update is finished.
+        """
+        added, self.changes["added"] = self.changes["added"], {}
+        changed, self.changes["changed"] = self.changes["changed"], {}
+        removed, self.changes["removed"] = self.changes["removed"], {}
+
+        self.header[HEADER_SEQUENCE] += 1
+        for entity_id, category in removed.items():
+            if self.rows.__contains__(category) and self.rows[category].__contains__(entity_id):
+                self.remove_row(category, entity_id)
+        for entities in [added, changed]:
+            for entity in entities.values():
+                table = ENTITY_TABLES.get(entity.__class__.__name__)
+                if table is not None and self.world.entities.get(entity.id) is entity:
+                    self.write_row(table, entity)
+        self.write_counts()
+        self.header[HEADER_TICK] = self.world.tick
+        self.header[HEADER_SEQUENCE] += 1
+
+    def write_row(self, table, entity):
+        row = self.rows[table].get(entity.id)
+        if row is None:
+            row = self.row_ids[table].__len__()
+            if row >= self.capacities[table]:
+                self.capacities[table] *= 2
+                self.create_data_block()
+            self.rows[table][entity.id] = row
+            self.row_ids[table].append(entity.id)
+        for column in TABLES[table]:
+            value = entity.fields[column[1]]
+            if column[0] == "inventory":
+                value = value.__len__()
+            self.columns[table][column[0]][row] = -1 if value is None else value
+
+    def remove_row(self, table, entity_id):
+        row = self.rows[table].pop(entity_id)
+        last_id = self.row_ids[table].pop()
+        if last_id != entity_id:
+            # The last row takes the place of the removed row
+            for array in self.columns[table].values():
+                array[row] = array[self.row_ids[table].__len__()]
+            self.rows[table][last_id] = row
+            self.row_ids[table][row] = last_id
+
+    def write_counts(self):
+        for index, table in enumerate(TABLES):
+            self.header[3 + index] = self.row_ids[table].__len__()
+
+    def close(self):
+        """
+        Stops tracking the world and removes the shared memory.
+        """
+        if self.changes in self.world.change_trackers:
+            self.world.change_trackers.remove(self.changes)
+        self.columns = None
+        self.header = None
+        for memory in [self.data_memory, self.header_memory]:
+            memory.close()
+            memory.unlink()
+
+
+class SharedWorldView:
+
+    def __init__(self, name):
+        """
+        Reads the tables of a SharedWorldState from any process. The arrays are read-only views of the shared memory, so
+        they always hold the latest state of the world and nothing is copied. Use read to get a copy of the tables
+        from a single tick.
+
+        :param name: the name of the SharedWorldState
+        """
+        self.header_memory = shared_memory.SharedMemory(name=name)
+        self.name = name
+        self.header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.header_memory.buf)
+        self.header.flags.writeable = False
+        self.generation = -1
+        self.data_memory = None
+        self.columns = None
+
+    def get_tables(self):
+        """
+        :return: A dictionary of the tables (actors, mines, sites, resources), each a dictionary of read-only arrays by
+        the name of the column, with one row for each entity
+        """
+        generation = int(self.header[HEADER_GENERATION])
+        if generation != self.generation:
+            # The tables outgrew their data block, so attach to the new one
+            capacities = {table: int(self.header[3 + TABLES.__len__() + index]) for index, table in enumerate(TABLES)}
+            data_memory = shared_memory.SharedMemory(name=f"{self.name}_{generation}")
+            self.columns = None
+            if self.data_memory is not None:
+                self.data_memory.close()
+            self.data_memory = data_memory
+            self.columns = get_columns(self.data_memory.buf, capacities, False)
+            self.generation = generation
+        return {table: {column: array[:int(self.header[3 + index])] for column, array in self.columns[table].items()}
+                for index, table in enumerate(TABLES)}
+
+    def get_tick(self):
+        return int(self.header[HEADER_TICK])
+
+    def read(self):
+        """
+        Copies the tables once the world is not being written to, so that every row is from the same tick.
+
+        :return: The tick the tables are from, and a copy of the tables as given by get_tables
+        """
+        while True:
+            sequence = int(self.header[HEADER_SEQUENCE])
+            if sequence % 2 == 0:
+                try:
+                    tick = self.get_tick()
+                    tables = {table: {column: array.copy() for column, array in columns.items()} for table, columns in
+                              self.get_tables().items()}
+                except FileNotFoundError:
+                    # The data block was replaced while it was being attached to
+                    continue
+                if int(self.header[HEADER_SEQUENCE]) == sequence:
+                    return tick, tables
+
+    def close(self):
+        self.columns = None
+        self.header = None
+        for memory in [self.data_memory, self.header_memory]:
+            if memory is not None:
+                memory.close()
@@ -0,0 +1,21 @@
+import pickle
+
+
+def encode(snapshot):
+    """
+    Encodes a world snapshot, or a delta of snapshots, as bytes. Snapshots are only plain data (dictionaries, lists,
+    tuples, numbers, strings, booleans and None), so no classes are pickled and they can be decoded without the
+    simulation.
+
+    :param snapshot: the snapshot given by World.get_world_snapshot or World.get_world_delta with snapshot set
+    :return: The encoded snapshot
+    """
+    return pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode(data):
+    """
+    :param data: a snapshot encoded by encode
+    :return: The snapshot
+    """
+    return pickle.loads(data)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+
+class TickScheduler:
+
+    def __init__(self, interval, func, catch_up=0, on_stop=None):
+        """
+        Calls a function repeatedly on its own thread, once every interval. Each call is scheduled against a fixed
+        deadline measured from when the scheduler started, so the time the function takes is not added to the interval
+        and the rate does not drift.
+
+        If a call finishes after the deadline of the next call then the next call is late. Up to catch_up late calls are
+        made back to back to catch up with the deadlines, after which any calls whose deadlines have passed are dropped
+        and the scheduler carries on from the next deadline.
+
+        :param interval: the number of seconds between each call
+        :param func: the function to be called
+        :param catch_up: (optional) the most late calls that are made back to back. Default: 0 (late calls are dropped)
+        :param on_stop: (optional) a function called on the scheduler's thread once it has stopped, after the time the
+        last call took has been recorded. This is also called if the function raises an exception. Default: None
+        """
+        self.interval = interval
+        self.func = func
+        self.catch_up = catch_up
+        self.on_stop = on_stop
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.thread = None
+
+        self.start_time = None
+        self.tick_durations = []
+        self.overruns = 0
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+
+    def start(self):
+        """
+        Starts calling the function on a new thread. The first call is made after one interval.
+        """
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the scheduler has stopped and the call in progress, if any, has finished. This does not wait for
+        on_stop, so it can be called from on_stop or while on_stop is waiting for the caller.
+
+        :param timeout: (optional) the most seconds to wait for. Default: None (wait for as long as it takes)
+        :return: True if the scheduler has finished, and False if the timeout ran out first
+        """
+        return self.finished.wait(timeout)
+
+    def run(self):
+        try:
+            self.run_calls()
+        finally:
+            self.finished.set()
+            if self.on_stop is not None:
+                self.on_stop()
+
+    def run_calls(self):
+        next_tick = self.start_time + self.interval
+        late_in_a_row = 0
+        while not self.stopped.wait(max(0.0, next_tick - time.perf_counter())):
+            if late_in_a_row:
+                self.late_ticks += 1
+            tick_start = time.perf_counter()
+            self.func()
+            tick_end = time.perf_counter()
+            self.tick_durations.append(tick_end - tick_start)
+            if tick_end - tick_start > self.interval:
+                self.overruns += 1
+
+            next_tick += self.interval
+            if tick_end > next_tick:
+                late_in_a_row += 1
+                if late_in_a_row > self.catch_up:
+                    # Drop every call whose deadline has passed, and carry on from the next deadline
+                    dropped = int((tick_end - next_tick) / self.interval) + 1
+                    self.dropped_ticks += dropped
+                    next_tick += dropped * self.interval
+                    late_in_a_row = 0
+            else:
+                late_in_a_row = 0
+
+    def get_metrics(self):
+        """
+        :return: A dictionary of the rate the function was meant to be called at and the rate it was called at (in
+        calls per second), the number of calls, the number of calls that took longer than the interval (overruns), that
+        were made back to back to catch up (late_ticks) and that were dropped, and the mean and maximum time each call
+        took in seconds
+        """
+        elapsed = 0 if self.start_time is None else time.perf_counter() - self.start_time
+        ticks = self.tick_durations.__len__()
+        return {"target_hz": 1 / self.interval,
+                "achieved_hz": ticks / elapsed if elapsed else 0,
+                "ticks": ticks,
+                "overruns": self.overruns,
+                "late_ticks": self.late_ticks,
+                "dropped_ticks": self.dropped_ticks,
+                "mean_tick_duration": sum(self.tick_durations) / ticks if ticks else 0,
+                "max_tick_duration": max(self.tick_durations, default=0)}
@@ -1,5 +1,10 @@
+import heapq
+from collections import deque
 import random as r
+import numpy as np
+import numpy.random as nr
 import math as m
+import threading
 import time
 
 from api.command import Command
@@ -15,6 +20,12 @@ from entities.task import Task
 
 class World:
 
+    # The key in world_info that each type of entity is found under
+    ENTITY_CATEGORIES = {"Node": "nodes", "Edge": "edges", "Actor": "actors", "Resource": "resources", "Mine": "mines",
+                         "Site": "sites", "Building": "buildings", "Task": "tasks", "Command": "commands"}
+
+    PO_RULES = ["ACTOR_PO", "NODE_PO", "EDGE_PO", "RESOURCE_PO", "MINE_PO", "SITE_PO", "BUILDING_PO", "TASK_PO"]
+
     def __init__(self, modifiers=None, world_gen_modifiers=None, rules=None):
         if modifiers is None or world_gen_modifiers is None or rules is None:
             pass
@@ -24,16 +35,16 @@ class World:
             self.rules = rules
 
             """ 
-            Set random seed before any other calls
+            Create the random number generators before any other calls. Each world has its own generators, so that
+            worlds with the same seed behave the same no matter what else is running in the same process
             
             Save the seed to be output with the results
             """
             self.seed = int(time.time())
             if "RANDOM_SEED" in self.world_gen_modifiers:
-                r.seed(self.world_gen_modifiers["RANDOM_SEED"])
                 self.seed = self.world_gen_modifiers["RANDOM_SEED"]
-            else:
-                r.seed(self.seed)
+            self.random = r.Random(self.seed)
+            self.np_random = nr.default_rng(self.seed)
 
             self.building_modifiers = {
                 Building.BUILDING_SPEED:        0,
@@ -45,12 +56,25 @@ class World:
             self.tick = 0
             self.last_id = -1
             self.command_queue = []
+            # In real time agents send commands from their own threads while the world ticks, so ID's are given out and
+            # commands are queued under locks. The queue is swapped for an empty one when the commands are performed
+            self.id_lock = threading.Lock()
+            self.command_lock = threading.Lock()
             self.total_score = 0
             self.total_commands = 0
             self.resources_collected = 0
             self.actor_idle_time = {}
             self.failures = 0
 
+            # Only actors that are doing something need to be updated each tick, and idle time is counted from the tick
+            # each actor became idle instead of every tick
+            self.active_actors = {}
+            self.idle_since = {}
+            # Green resources ordered by the tick they decay at, so that resources are only updated when they decay
+            self.decay_schedule = []
+            # Tasks with a deadline ordered by their deadline, so that tasks are marked as changed once it has passed
+            self.deadline_schedule = []
+
             self.actors = []
             self.buildings = []
             self.edges = []
@@ -59,47 +83,195 @@ class World:
             self.resources = []
             self.sites = []
             self.tasks = []
-            self.commands = []
+            # Saved commands in the order they were performed, and the fields of the saved commands by the actor they
+            # were sent to. Only the most recent are kept, as set by the COMMAND_HISTORY_LENGTH and COMMAND_HISTORY_AGE
+            # rules
+            self.commands = deque()
+            self.commands_by_actor = {}
+
+            # The nodes each actor can see, shared by the info builders and recalculated once the tick advances
+            self.visible_nodes = {}
+            self.visibility_tick = -1
+
+            # Every entity that can be found via get_by_id, keyed by id, and partitioned by the entity's class name
+            self.entities = {}
+            self.entities_by_type = {"Node": {}, "Edge": {}, "Actor": {}, "Resource": {}, "Mine": {}, "Site": {},
+                                     "Building": {}, "Task": {}, "Command": {}}
+
+            # Records of the entities that have been added, changed or removed, one for each API that asks for deltas
+            self.change_trackers = []
 
-            self.create_nodes_prm()
+            # The mirror of the world in shared memory, if the SHARED_WORLD_STATE rule is set (see SharedWorldState)
+            self.shared_state = None
+
+            if self.world_gen_modifiers["GRAPH_GEN_METHOD"] == 1:
+                self.create_nodes_batch()
+            else:
+                self.create_nodes_prm()
+            # The distance and next hop between every pair of nodes, so that agents can look up any path or distance
+            self.shortest_paths = self.find_shortest_paths()
             self.tasks = self.generate_tasks()
 
     def create_nodes_prm(self):
+        """
+        Creates the nodes and edges of the world. Each new node is cast from the last node that was added, and is kept
+        if it is not too close to any other node and it can be connected to at least one other node. The nodes are kept
+        in a grid of cells the size of CONNECT_DISTANCE, so that each new node is only compared to the nodes in the
+        cells around it.
+        """
+        min_distance = self.world_gen_modifiers["MIN_DISTANCE"]
+        connect_distance = self.world_gen_modifiers["CONNECT_DISTANCE"]
+        cell_size = max(connect_distance, 1)
+        cell_range = m.ceil(max(min_distance, connect_distance) / cell_size)
+        grid = {}
+
+        def add_to_grid(grid_node):
+            cell = (m.floor(grid_node.x / cell_size), m.floor(grid_node.y / cell_size))
+            if grid.__contains__(cell):
+                grid[cell].append(grid_node)
+            else:
+                grid.__setitem__(cell, [grid_node])
+
+        def get_nearby_nodes(x, y):
+            cell_x = m.floor(x / cell_size)
+            cell_y = m.floor(y / cell_size)
+            nearby_nodes = []
+            for near_x in range(cell_x - cell_range, cell_x + cell_range + 1):
+                for near_y in range(cell_y - cell_range, cell_y + cell_range + 1):
+                    nearby_nodes.extend(grid.get((near_x, near_y), []))
+            # Keep the order the nodes were created in, so that edges are created in the same order
+            nearby_nodes.sort(key=lambda nearby_node: nearby_node.id)
+            return nearby_nodes
+
         self.nodes = [Node(self, self.world_gen_modifiers["WIDTH"]/2, self.world_gen_modifiers["HEIGHT"]/2)]
+        self.register_entity(self.nodes[0])
+        add_to_grid(self.nodes[0])
         attempts = 0
         curr_x = self.nodes[0].x
         curr_y = self.nodes[0].y
         for i in range(self.world_gen_modifiers["MAX_NODES"] - 1):
             ok = False
             while not ok:
-                ok = True
-                rand_angle = r.randint(0, 360)
-                rand_deviation = r.randint(-1 * self.world_gen_modifiers["RANDOM_DEVIATION"],
+                rand_angle = self.random.randint(0, 360)
+                rand_deviation = self.random.randint(-1 * self.world_gen_modifiers["RANDOM_DEVIATION"],
                                            self.world_gen_modifiers["RANDOM_DEVIATION"])
                 new_x = m.floor(curr_x + rand_deviation + self.world_gen_modifiers["CAST_DISTANCE"] * m.cos(rand_angle))
                 new_y = m.floor(curr_y + rand_deviation + self.world_gen_modifiers["CAST_DISTANCE"] * m.sin(rand_angle))
-                for node in self.nodes:
-                    if m.dist((new_x, new_y), (node.x, node.y)) <= self.world_gen_modifiers["MIN_DISTANCE"] or\
-                            new_x < 0 or new_x > self.world_gen_modifiers["WIDTH"] or new_y < 0 \
-                            or new_y > self.world_gen_modifiers["HEIGHT"]:
-                        ok = False
-                        break
-                no_new_edges = True
+                ok = 0 <= new_x <= self.world_gen_modifiers["WIDTH"] and 0 <= new_y <= self.world_gen_modifiers["HEIGHT"]
+                if ok:
+                    nearby_nodes = get_nearby_nodes(new_x, new_y)
+                    for node in nearby_nodes:
+                        if m.dist((new_x, new_y), (node.x, node.y)) <= min_distance:
+                            ok = False
+                            break
                 if ok:
                     new_node = Node(self, new_x, new_y)
-                    new_edges = []
-                    for node in self.nodes:
-                        if m.dist((new_x, new_y), (node.x, node.y)) <= self.world_gen_modifiers["CONNECT_DISTANCE"]:
-                            new_edges.append(self.add_edge(node, new_node))
+                    no_new_edges = True
+                    for node in nearby_nodes:
+                        if m.dist((new_x, new_y), (node.x, node.y)) <= connect_distance:
+                            self.add_edge(node, new_node)
                             no_new_edges = False
                     if not no_new_edges:
                         self.nodes.append(new_node)
+                        self.register_entity(new_node)
+                        add_to_grid(new_node)
                         curr_x = new_x
                         curr_y = new_y
                 attempts += 1
                 if attempts >= self.world_gen_modifiers["MAX_ATTEMPTS"]:
                     break
 
+    def create_nodes_batch(self):
+        """
+        Creates the nodes and edges of the world in the same way as create_nodes_prm, but casts a batch of candidate
+        nodes at once using NumPy. Each candidate is cast from one of the most recently added nodes, and is kept if it
+        is not too close to any other node and it is within CONNECT_DISTANCE of a node from an earlier batch. Where two
+        candidates in a batch are too close to each other, only the one cast first can be kept. The nodes are kept in a grid of
+        cells small enough to hold at most one node each, so that every distance check only looks at nearby cells.
+        Once every node is placed, each node is connected to all of the earlier nodes within CONNECT_DISTANCE.
+        """
+        width = self.world_gen_modifiers["WIDTH"]
+        height = self.world_gen_modifiers["HEIGHT"]
+        max_nodes = self.world_gen_modifiers["MAX_NODES"]
+        max_attempts = self.world_gen_modifiers["MAX_ATTEMPTS"]
+        batch_size = self.world_gen_modifiers["GRAPH_GEN_BATCH_SIZE"]
+        cast_distance = self.world_gen_modifiers["CAST_DISTANCE"]
+        random_deviation = self.world_gen_modifiers["RANDOM_DEVIATION"]
+        min_distance = self.world_gen_modifiers["MIN_DISTANCE"]
+        connect_distance = self.world_gen_modifiers["CONNECT_DISTANCE"]
+
+        # Any two nodes in the same cell are at most min_distance apart, so only one of them could have been kept
+        cell_size = max(min_distance / m.sqrt(2), 1)
+        grid = np.full((m.floor(width / cell_size) + 1, m.floor(height / cell_size) + 1), -1)
+        positions = np.empty((max(max_nodes, 1), 2))
+        positions[0] = (width / 2, height / 2)
+        grid[m.floor(positions[0, 0] / cell_size), m.floor(positions[0, 1] / cell_size)] = 0
+
+        def get_nearby_nodes(points, distance):
+            """
+            :return: An array of the indices of the nodes in the cells around each point that could be within the
+            distance (-1 where a cell is empty), and an array of the distances to those nodes (inf where a cell is empty)
+            """
+            reach = m.ceil(distance / cell_size)
+            offsets = np.arange(-reach, reach + 1)
+            cells = np.floor(points / cell_size).astype(int)
+            cells_x, cells_y = np.broadcast_arrays(cells[:, 0, None, None] + offsets[None, :, None],
+                                                   cells[:, 1, None, None] + offsets[None, None, :])
+            cells_x = cells_x.reshape(points.shape[0], -1)
+            cells_y = cells_y.reshape(points.shape[0], -1)
+            in_grid = (cells_x >= 0) & (cells_x < grid.shape[0]) & (cells_y >= 0) & (cells_y < grid.shape[1])
+            indices = np.where(in_grid, grid[np.clip(cells_x, 0, grid.shape[0] - 1),
+                                             np.clip(cells_y, 0, grid.shape[1] - 1)], -1)
+            offsets_to_nodes = positions[indices] - points[:, None, :]
+            distances = np.hypot(offsets_to_nodes[..., 0], offsets_to_nodes[..., 1])
+            return indices, np.where(indices >= 0, distances, np.inf)
+
+        node_count = 1
+        attempts = 0
+        while node_count < max_nodes and attempts < max_attempts:
+            # Batches grow with the number of nodes, as candidates can only be cast from nodes that already exist
+            num_of_candidates = min(batch_size, node_count * 2, max_attempts - attempts)
+            attempts += num_of_candidates
+
+            recent_nodes = positions[max(0, node_count - batch_size):node_count]
+            parents = recent_nodes[self.np_random.integers(0, recent_nodes.shape[0], num_of_candidates)]
+            angles = self.np_random.integers(0, 361, num_of_candidates)
+            deviations = self.np_random.integers(-1 * random_deviation, random_deviation + 1, num_of_candidates)
+            candidates = np.floor(parents + deviations[:, None] +
+                                  cast_distance * np.stack((np.cos(angles), np.sin(angles)), axis=1))
+
+            in_bounds = (candidates[:, 0] >= 0) & (candidates[:, 0] <= width) & \
+                        (candidates[:, 1] >= 0) & (candidates[:, 1] <= height)
+            candidates = candidates[in_bounds]
+            if candidates.shape[0] == 0:
+                continue
+            distances = get_nearby_nodes(candidates, max(min_distance, connect_distance))[1]
+            candidates = candidates[~(distances <= min_distance).any(axis=1) &
+                                    (distances <= connect_distance).any(axis=1)]
+
+            differences = candidates[:, None, :] - candidates[None, :, :]
+            too_close = np.tril(np.hypot(differences[..., 0], differences[..., 1]) <= min_distance, -1)
+            candidates = candidates[~too_close.any(axis=1)][:max_nodes - node_count]
+
+            new_indices = np.arange(node_count, node_count + candidates.shape[0])
+            positions[new_indices] = candidates
+            grid[np.floor(candidates[:, 0] / cell_size).astype(int),
+                 np.floor(candidates[:, 1] / cell_size).astype(int)] = new_indices
+            node_count += candidates.shape[0]
+
+        self.nodes = [Node(self, width / 2, height / 2)]
+        self.register_entity(self.nodes[0])
+        for x, y in positions[1:node_count].astype(int).tolist():
+            self.nodes.append(Node(self, x, y))
+            self.register_entity(self.nodes[-1])
+
+        indices, distances = get_nearby_nodes(positions[:node_count], connect_distance)
+        node_indices, columns = np.nonzero((distances <= connect_distance) & (indices < np.arange(node_count)[:, None]))
+        other_indices = indices[node_indices, columns]
+        order = np.lexsort((other_indices, node_indices))
+        for node_index, other_index in zip(node_indices[order].tolist(), other_indices[order].tolist()):
+            self.add_edge(self.nodes[other_index], self.nodes[node_index])
+
     def get_world_info(self, target_actors=None):
         if target_actors is None:
             actors = self.actors
@@ -119,35 +291,12 @@ class World:
         nodes_info = {}
         if self.rules["NODE_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    if nodes_info.__contains__(actor.node.id):
-                        nodes_info.get(actor.node.id)["observers"].append(actor.id)
+                for node in self.get_visible_nodes(actor):
+                    if nodes_info.__contains__(node.id):
+                        nodes_info.get(node.id)["observers"].append(actor.id)
                     else:
-                        nodes_info.__setitem__(actor.node.id, actor.node.fields)
-                        nodes_info.get(actor.node.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node_id in node_stack:
-                        if nodes_info.__contains__(node_id):
-                            nodes_info.get(node_id)["observers"].append(actor.id)
-                        else:
-                            nodes_info.__setitem__(node_id, node_stack[node_id].fields)
-                            nodes_info.get(node_id).__setitem__("observers", [actor.id])
+                        nodes_info.__setitem__(node.id, node.fields)
+                        nodes_info.get(node.id).__setitem__("observers", [actor.id])
         else:
             for node in self.nodes:
                 nodes_info.__setitem__(node.id, node.fields)
@@ -182,49 +331,70 @@ class World:
                         if tasks_info[task_id]["node"] == node.id:
                             nodes_info.get(node.id)["tasks"].append(task_id)
 
+        # Only the commands sent to the actors in actors_info are gathered, rather than every saved command
         commands_info = {}
-        for command in self.commands:
-            if actors_info.__contains__(command.args[0]):
-                commands_info.__setitem__(command.id, command.fields)
+        for actor_id in actors_info:
+            if self.commands_by_actor.__contains__(actor_id):
+                commands_info.update(self.commands_by_actor[actor_id])
 
         return {"tick": self.tick, "actors": actors_info, "nodes": nodes_info, "edges": edges_info, "resources": resources_info,
                 "mines": mines_info, "sites": sites_info, "buildings": buildings_info, "tasks": tasks_info, "commands": commands_info}
-    
+
+    def get_visible_nodes(self, actor):
+        """
+        Returns the nodes the actor can currently see when the simulation is partially observable. The result is shared
+        by all of the info builders, and is only calculated once per actor until the tick advances.
+
+        :param actor: the actor that is observing the world
+        :return: A list of the nodes visible to the actor
+        """
+        if self.visibility_tick != self.tick:
+            self.visible_nodes = {}
+            self.visibility_tick = self.tick
+        if actor.id not in self.visible_nodes:
+            self.visible_nodes[actor.id] = self.find_visible_nodes(actor)
+        return self.visible_nodes[actor.id]
+
+    def find_visible_nodes(self, actor):
+        """
+        Works out which nodes the actor can see. An actor that is moving or recovering cannot see anything, an actor that
+        is looking can see one layer of nodes further for every LOOK_EFFORT ticks it has been looking, and any other
+        actor can see the node it is at.
+
+        :param actor: the actor that is observing the world
+        :return: A list of the nodes visible to the actor, in the order they were found
+        """
+        if actor.state == actor.MOVING or actor.state == actor.RECOVERING:
+            return []
+        if actor.state != actor.LOOKING:
+            return [actor.node]
+
+        node_stack = {actor.node.id: actor.node}
+        frontier = [actor.node]
+        layer = 0
+        while frontier and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
+            layer += 1
+            new_nodes = []
+            for node in frontier:
+                for edge in node.edges:
+                    new_node = edge.get_other_node(node)
+                    if not node_stack.__contains__(new_node.id):
+                        node_stack.__setitem__(new_node.id, new_node)
+                        new_nodes.append(new_node)
+            frontier = new_nodes
+        return list(node_stack.values())
+
     def get_actor_info(self, actors):
         actor_info = {}
         if self.rules["ACTOR_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for actor_at_node in actor.node.actors:
+                for node in self.get_visible_nodes(actor):
+                    for actor_at_node in node.actors:
                         if actor_at_node.id in actor_info:
                             actor_info.get(actor_at_node.id)["observers"].append(actor.id)
                         else:
                             actor_info.__setitem__(actor_at_node.id, actor_at_node.fields)
                             actor_info.get(actor_at_node.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for actor_at_node in node_stack[node].actors:
-                            if actor_at_node.id in actor_info:
-                                actor_info.get(actor_at_node.id)["observers"].append(actor.id)
-                            else:
-                                actor_info.__setitem__(actor_at_node.id, actor_at_node.fields)
-                                actor_info.get(actor_at_node.id).__setitem__("observers", [actor.id])
         else:
             for actor in self.actors:
                 actor_info.__setitem__(actor.id, actor.fields)
@@ -234,37 +404,13 @@ class World:
         tasks = {}
         if self.rules["TASK_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for task in actor.node.tasks:
+                for node in self.get_visible_nodes(actor):
+                    for task in node.tasks:
                         if tasks.__contains__(task.id):
                             tasks.get(task.id)["observers"].append(actor.id)
                         else:
                             tasks.__setitem__(task.id, task.fields)
                             tasks.get(task.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for task in node_stack[node].tasks:
-                            if tasks.__contains__(task.id):
-                                tasks.get(task.id)["observers"].append(actor.id)
-                            else:
-                                tasks.__setitem__(task.id, task.fields)
-                                tasks.get(task.id).__setitem__("observers", [actor.id])
         else:
             for task in self.tasks:
                 tasks.__setitem__(task.id, task.fields)
@@ -274,37 +420,13 @@ class World:
         buildings = {}
         if self.rules["BUILDING_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for building in actor.node.buildings:
+                for node in self.get_visible_nodes(actor):
+                    for building in node.buildings:
                         if buildings.__contains__(building.id):
                             buildings.get(building.id)["observers"].append(actor.id)
                         else:
                             buildings.__setitem__(building.id, building.fields)
                             buildings.get(building.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for building in node_stack[node].buildings:
-                            if buildings.__contains__(building.id):
-                                buildings.get(building.id)["observers"].append(actor.id)
-                            else:
-                                buildings.__setitem__(building.id, building.fields)
-                                buildings.get(building.id).__setitem__("observers", [actor.id])
         else:
             for building in self.buildings:
                 buildings.__setitem__(building.id, building.fields)
@@ -314,37 +436,13 @@ class World:
         sites = {}
         if self.rules["SITE_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for site in actor.node.sites:
+                for node in self.get_visible_nodes(actor):
+                    for site in node.sites:
                         if sites.__contains__(site.id):
                             sites.get(site.id)["observers"].append(actor.id)
                         else:
                             sites.__setitem__(site.id, site.fields)
                             sites.get(site.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for site in node_stack[node].sites:
-                            if sites.__contains__(site.id):
-                                sites.get(site.id)["observers"].append(actor.id)
-                            else:
-                                sites.__setitem__(site.id, site.fields)
-                                sites.get(site.id).__setitem__("observers", [actor.id])
         else:
             for site in self.sites:
                 if hasattr(site, 'fields'): sites.__setitem__(site.id, site.fields)
@@ -354,37 +452,13 @@ class World:
         mines = {}
         if self.rules["MINE_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for mine in actor.node.mines:
+                for node in self.get_visible_nodes(actor):
+                    for mine in node.mines:
                         if mines.__contains__(mine.id):
                             mines.get(mine.id)["observers"].append(actor.id)
                         else:
                             mines.__setitem__(mine.id, mine.fields)
                             mines.get(mine.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for mine in node_stack[node].mines:
-                            if mines.__contains__(mine.id):
-                                mines.get(mine.id)["observers"].append(actor.id)
-                            else:
-                                mines.__setitem__(mine.id, mine.fields)
-                                mines.get(mine.id).__setitem__("observers", [actor.id])
         else:
             for mine in self.mines:
                 mines.__setitem__(mine.id, mine.fields)
@@ -394,51 +468,20 @@ class World:
         resources = {}
         if self.rules["RESOURCE_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for resource in actor.node.resources:
+                for node in self.get_visible_nodes(actor):
+                    for resource in node.resources:
                         if resources.__contains__(resource.id):
                             resources.get(resource.id)["observers"].append(actor.id)
                         else:
                             resources.__setitem__(resource.id, resource.fields)
                             resources.get(resource.id).__setitem__("observers", [actor.id])
-                    for node_actor in actor.node.actors:
+                    for node_actor in node.actors:
                         for resource in node_actor.resources:
                             if resources.__contains__(resource.id):
                                 resources.get(resource.id)["observers"].append(actor.id)
                             else:
                                 resources.__setitem__(resource.id, resource.fields)
                                 resources.get(resource.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for resource in node_stack[node].resources:
-                            if resources.__contains__(resource.id):
-                                resources.get(resource.id)["observers"].append(actor.id)
-                            else:
-                                resources.__setitem__(resource.id, resource.fields)
-                                resources.get(resource.id).__setitem__("observers", [actor.id])
-                        for node_actor in node_stack[node].actors:
-                            for resource in node_actor.resources:
-                                if resources.__contains__(resource.id):
-                                    resources.get(resource.id)["observers"].append(actor.id)
-                                else:
-                                    resources.__setitem__(resource.id, resource.fields)
-                                    resources.get(resource.id).__setitem__("observers", [actor.id])
         else:
             for resource in self.resources:
                 resources.__setitem__(resource.id, resource.fields)
@@ -448,39 +491,14 @@ class World:
         edges = {}
         if self.rules["EDGE_PO"]:
             for actor in actors:
-                if actor.state != actor.LOOKING and actor.state != actor.MOVING and actor.state != actor.RECOVERING:
-                    for edge in actor.node.edges:
+                for node in self.get_visible_nodes(actor):
+                    for edge in node.edges:
                         if edges.__contains__(edge.id):
                             if not edges.get(edge.id)["observers"].__contains__(actor.id):
                                 edges.get(edge.id)["observers"].append(actor.id)
                         else:
                             edges.__setitem__(edge.id, edge.fields)
                             edges.get(edge.id).__setitem__("observers", [actor.id])
-                elif actor.state == actor.LOOKING:
-                    node_stack = {actor.node.id: actor.node}
-                    got_new_nodes = True
-                    layer = 0
-                    new_nodes = []
-                    while got_new_nodes and layer < actor.progress / self.modifiers["LOOK_EFFORT"]:
-                        got_new_nodes = False
-                        layer += 1
-                        for node_id in node_stack:
-                            for edge in node_stack[node_id].edges:
-                                new_node = edge.get_other_node(node_stack[node_id])
-                                if not node_stack.__contains__(new_node.id):
-                                    new_nodes.append(new_node)
-                                    got_new_nodes = True
-                        if got_new_nodes:
-                            for new_node in new_nodes:
-                                node_stack.__setitem__(new_node.id, new_node)
-                    for node in node_stack:
-                        for edge in node_stack[node].edges:
-                            if edges.__contains__(edge.id):
-                                if not edges.get(edge.id)["observers"].__contains__(actor.id):
-                                    edges.get(edge.id)["observers"].append(actor.id)
-                            else:
-                                edges.__setitem__(edge.id, edge.fields)
-                                edges.get(edge.id).__setitem__("observers", [actor.id])
         else:
             for edge in self.edges:
                 edges.__setitem__(edge.id, edge.fields)
@@ -493,13 +511,13 @@ class World:
         if self.tasks_complete() and self.world_gen_modifiers["REFRESH_TASKS"]:
             self.tasks.extend(self.generate_tasks())
         else:
-            if r.random() < self.modifiers["NEW_TASK_CHANCE"]:
-                self.tasks.append(Task(self))
+            if self.random.random() < self.modifiers["NEW_TASK_CHANCE"]:
+                self.add_task()
         self.tick += 1
-        for actor in self.actors:
-            if actor.state == Actor.IDLE:
-                #TODO: Is this the best way to track if an actor is idle? If it does things that happen instantly, like picking up a resource, then it is still considered idle.
-                self.actor_idle_time[actor.id] += 1
+        self.update_task_deadlines()
+        self.remove_old_commands()
+        if self.shared_state is not None:
+            self.shared_state.update()
         """
         if self.tick % 100 == 0:
             print(f"Actors: {self.actors}\n"
@@ -513,22 +531,89 @@ class World:
                   f"Commands: {self.commands}\n")
                   """
 
+    def queue_command(self, command):
+        """
+        Adds a command to the queue of commands that are performed at the start of the next tick. This can be called
+        from any thread.
+
+        :param command: the command to be performed
+        """
+        with self.command_lock:
+            self.command_queue.append(command)
+            self.total_commands += 1
+
     def run_agent_commands(self):
-        if self.command_queue:
-            for command in self.command_queue:
+        # Commands that are queued while these are performed are left for the next tick
+        with self.command_lock:
+            command_queue, self.command_queue = self.command_queue, []
+        if command_queue:
+            for command in command_queue:
                 if command.save:
                     self.commands.append(command)
-            for command in self.command_queue:
+                    self.commands_by_actor.setdefault(command.args[0], {})[command.id] = command.fields
+                    self.register_entity(command)
+            for command in command_queue:
                 command.perform()
-            self.command_queue = []
+
+    def remove_old_commands(self):
+        """
+        Removes the oldest saved commands once there are more than COMMAND_HISTORY_LENGTH of them, or once they were
+        performed at least COMMAND_HISTORY_AGE ticks ago. Either rule is ignored if it is 0.
+        """
+        length = self.rules["COMMAND_HISTORY_LENGTH"]
+        age = self.rules["COMMAND_HISTORY_AGE"]
+        while self.commands and ((length and self.commands.__len__() > length) or
+                                 (age and self.tick - self.commands[0].tick >= age)):
+            command = self.commands.popleft()
+            actor_commands = self.commands_by_actor[command.args[0]]
+            actor_commands.pop(command.id)
+            if not actor_commands:
+                self.commands_by_actor.pop(command.args[0])
+            self.unregister_entity(command)
 
     def update_all_actors(self):
-        for actor in self.actors:
+        # Idle actors do nothing when updated. The actors are updated in the order they were added
+        for actor in [self.active_actors[actor_id] for actor_id in sorted(self.active_actors)]:
             actor.update()
-            
+
     def update_all_resources(self):
-        for resource in self.resources:
-            resource.update()
+        # Only green resources decay, so only the resources that are due to decay are updated
+        while self.decay_schedule and self.decay_schedule[0][0] <= self.tick:
+            _, resource_id, resource = heapq.heappop(self.decay_schedule)
+            if self.entities.get(resource_id) is resource:
+                resource.update()
+
+    def update_task_deadlines(self):
+        # A task is completed once its deadline has passed, which does not set any of its fields, so it is marked as
+        # changed here
+        while self.deadline_schedule and self.deadline_schedule[0][0] < self.tick:
+            _, task_id, task = heapq.heappop(self.deadline_schedule)
+            if self.entities.get(task_id) is task:
+                self.mark_changed(task)
+
+    def set_actor_active(self, actor, active):
+        """
+        Keeps track of which actors are doing something, and counts the time actors spend idle. An actor is counted as
+        idle for each tick it ends idle.
+
+        :param actor: the actor whose state has changed
+        :param active: True if the actor is no longer idle, and False if it is idle
+        """
+        if active:
+            if self.idle_since.__contains__(actor.id):
+                self.actor_idle_time[actor.id] += self.tick - self.idle_since.pop(actor.id)
+            self.active_actors[actor.id] = actor
+        else:
+            self.active_actors.pop(actor.id, None)
+            if not self.idle_since.__contains__(actor.id):
+                self.idle_since[actor.id] = self.tick
+
+    def get_actor_idle_time(self):
+        """
+        :return: A dictionary of the number of ticks each actor has spent idle, by the ID of the actor
+        """
+        return {actor_id: idle_time + (self.tick - self.idle_since[actor_id] if self.idle_since.__contains__(actor_id)
+                                       else 0) for actor_id, idle_time in self.actor_idle_time.items()}
 
     def tasks_complete(self):
         for task in self.tasks:
@@ -540,34 +625,198 @@ class World:
         tasks = []
         for index in range(self.world_gen_modifiers["INITIAL_TASKS"]):
             tasks.append(Task(self))
+            self.register_entity(tasks[-1])
+            self.schedule_deadline(tasks[-1])
         return tasks
 
+    def add_task(self):
+        self.tasks.append(Task(self))
+        self.register_entity(self.tasks[-1])
+        self.schedule_deadline(self.tasks[-1])
+        return self.tasks[-1]
+
+    def schedule_deadline(self, task):
+        if task.deadline != -1:
+            heapq.heappush(self.deadline_schedule, (task.deadline, task.id, task))
+
     def add_actor(self, node):
         self.actors.append(Actor(self, node))
         self.actor_idle_time[self.actors[-1].id] = 0
+        self.idle_since[self.actors[-1].id] = self.tick
+        self.register_entity(self.actors[-1])
         return self.actors[-1]
 
     def add_resource(self, location, colour):
         self.resources.append(Resource(self, location, colour))
         self.resources_collected += 1
+        self.register_entity(self.resources[-1])
+        if colour == 4:
+            heapq.heappush(self.decay_schedule, (self.tick + self.modifiers["GREEN_DECAY_TIME"], self.resources[-1].id,
+                                                 self.resources[-1]))
         return self.resources[-1]
 
     def add_mine(self, node, colour):
         self.mines.append(Mine(self, node, colour))
+        self.register_entity(self.mines[-1])
         return self.mines[-1]
 
     def add_site(self, node, building_type, target_task=None):
         self.sites.append(Site(self, node, building_type, target_task))
+        # Sites that could not find their needed resources are never placed on a node, so they cannot be found either
+        if self.sites[-1].needed_resources:
+            self.register_entity(self.sites[-1])
         return self.sites[-1]
 
     def add_building(self, node, building_type):
         self.buildings.append(Building(self, node, building_type))
+        self.register_entity(self.buildings[-1])
         return self.buildings[-1]
 
     def add_edge(self, node_a, node_b):
         self.edges.append(Edge(self, node_a, node_b))
+        self.register_entity(self.edges[-1])
         return self.edges[-1]
 
+    def register_entity(self, entity):
+        """
+        Adds an entity to the id index used by get_by_id. Called whenever an entity is added to the world.
+
+        :param entity: the entity to be indexed
+        """
+        self.entities[entity.id] = entity
+        self.entities_by_type[entity.__class__.__name__][entity.id] = entity
+        for changes in self.change_trackers:
+            changes["added"][entity.id] = entity
+
+    def unregister_entity(self, entity):
+        """
+        Removes an entity from the id index used by get_by_id. Called whenever an entity is removed from the world, such
+        as a resource being used or decaying, or a site becoming a building.
+
+        :param entity: the entity to be removed from the index
+        """
+        self.entities.pop(entity.id, None)
+        self.entities_by_type[entity.__class__.__name__].pop(entity.id, None)
+        for changes in self.change_trackers:
+            changes["added"].pop(entity.id, None)
+            changes["changed"].pop(entity.id, None)
+            changes["removed"][entity.id] = World.ENTITY_CATEGORIES[entity.__class__.__name__]
+
+    def mark_changed(self, entity):
+        """
+        Records that the fields of an entity have changed. Called by the entities whenever one of their fields is set.
+
+        :param entity: the entity that has changed
+        """
+        for changes in self.change_trackers:
+            changes["changed"][entity.id] = entity
+
+    def track_changes(self):
+        """
+        Starts recording the entities that are added, changed or removed from the world, so that the changes can be
+        collected with get_world_delta instead of building a whole new world_info.
+
+        :return: The record of changes, to be passed to get_world_delta
+        """
+        changes = {"added": {}, "changed": {}, "removed": {}, "visible": None}
+        self.change_trackers.append(changes)
+        return changes
+
+    def get_world_snapshot(self, target_actors=None):
+        """
+        Gives the same world as get_world_info, but only as plain data that can be pickled, sent to another process or
+        kept for as long as needed. See get_entity_snapshot.
+
+        :param target_actors: (optional) the IDs of the actors that are observing the world
+        :return: A dictionary with the current tick and the snapshot of each visible entity, sorted by the same keys used
+        in world_info
+        """
+        world_info = self.get_world_info(target_actors=target_actors)
+        snapshot = {"tick": world_info["tick"]}
+        for category in World.ENTITY_CATEGORIES.values():
+            snapshot[category] = {entity_id: self.get_entity_snapshot(entity_id, fields) for entity_id, fields in
+                                  world_info[category].items()}
+        return snapshot
+
+    def get_entity_snapshot(self, entity_id, fields):
+        """
+        Copies the fields of an entity into plain data. Any lists in the fields are copied so that the snapshot does not
+        change with the entity, and functions are replaced by what they would give: the "completed" field of a task is
+        whether the task is currently completed, and the "get_other_node" field of an edge is left out and nodes are
+        given "neighbours", the ID of the node at the other end of each edge in their "edges".
+
+        :param entity_id: the ID of the entity
+        :param fields: the fields of the entity, as given in world_info
+        :return: The snapshot of the entity
+        """
+        snapshot = {}
+        for field, value in fields.items():
+            if not callable(value):
+                snapshot[field] = value[:] if isinstance(value, list) else value
+        entity = self.entities.get(entity_id)
+        if isinstance(entity, Task):
+            snapshot["completed"] = entity.completed()
+        elif isinstance(entity, Node):
+            snapshot["neighbours"] = [self.entities[edge_id].get_other_node(entity).id for edge_id in fields["edges"]]
+        return snapshot
+
+    def get_world_delta(self, changes, target_actors=None, snapshot=False):
+        """
+        Collects the changes to the world since the last time this was called with the same record of changes, and then
+        clears the record. If any part of the world is partially observable then the visible world is compared against
+        what was visible last time, so entities that come into or out of sight are also added or removed. The first call
+        with a record of changes gives every visible entity as added.
+
+        :param changes: the record of changes made by track_changes
+        :param target_actors: (optional) the IDs of the actors that are observing the world
+        :param snapshot: (optional) if the added and changed entities should be given as snapshots (see
+        get_entity_snapshot) instead of their fields. Default: False
+        :return: A dictionary with the current tick, and the fields of added and changed entities and the IDs of the removed
+        entities, each sorted by the same keys used in world_info
+        """
+        added_entities, changes["added"] = changes["added"], {}
+        changed_entities, changes["changed"] = changes["changed"], {}
+        removed_entities, changes["removed"] = changes["removed"], {}
+
+        added = {category: {} for category in World.ENTITY_CATEGORIES.values()}
+        changed = {category: {} for category in World.ENTITY_CATEGORIES.values()}
+        removed = {category: [] for category in World.ENTITY_CATEGORIES.values()}
+
+        if any(self.rules[rule] for rule in World.PO_RULES) or changes["visible"] is None:
+            world_info = self.get_world_info(target_actors=target_actors)
+            visible = {}
+            for category in World.ENTITY_CATEGORIES.values():
+                for entity_id in world_info[category]:
+                    visible[entity_id] = category
+            # Nothing has been seen before the first call, so everything currently visible is new
+            previous = changes["visible"] if changes["visible"] is not None else {}
+            for entity_id, category in visible.items():
+                if entity_id not in previous:
+                    added[category][entity_id] = world_info[category][entity_id]
+                elif entity_id in changed_entities or entity_id in added_entities:
+                    changed[category][entity_id] = world_info[category][entity_id]
+            for entity_id, category in previous.items():
+                if entity_id not in visible:
+                    removed[category].append(entity_id)
+            changes["visible"] = visible
+        else:
+            for entity_id, entity in added_entities.items():
+                if not isinstance(entity, Command) or target_actors is None or entity.args[0] in target_actors:
+                    added[World.ENTITY_CATEGORIES[entity.__class__.__name__]][entity_id] = entity.fields
+            for entity_id, entity in changed_entities.items():
+                if entity_id in self.entities and entity_id not in added_entities and \
+                        (not isinstance(entity, Command) or target_actors is None or entity.args[0] in target_actors):
+                    changed[World.ENTITY_CATEGORIES[entity.__class__.__name__]][entity_id] = entity.fields
+            for entity_id, category in removed_entities.items():
+                removed[category].append(entity_id)
+
+        if snapshot:
+            for entities in [added, changed]:
+                for category in entities:
+                    entities[category] = {entity_id: self.get_entity_snapshot(entity_id, fields) for entity_id, fields
+                                          in entities[category].items()}
+        return {"tick": self.tick, "added": added, "changed": changed, "removed": removed}
+
     def get_colour_string(self, colour):
         if colour == 0:
             return "red"
@@ -591,8 +840,9 @@ class World:
         return edges
 
     def get_new_id(self):
-        self.last_id += 1
-        return self.last_id
+        with self.id_lock:
+            self.last_id += 1
+            return self.last_id
 
     def get_by_id(self, entity_id, target_actors=None, entity_type=None, target_node=None):
         if target_actors is not None:
@@ -603,44 +853,147 @@ class World:
                     entity_id not in visible_world["resources"] and entity_id not in visible_world["tasks"] and \
                     entity_id not in visible_world["commands"]:
                 return None
-        if target_node is None:
-            target_node = self.nodes
+        if entity_type is None:
+            entity = self.entities.get(entity_id)
         else:
-            target_node = [target_node]
-
-        if entity_type == "Command" or entity_type is None:
-            for command in self.commands:
-                if command.id == entity_id:
-                    return command
-        for node in target_node:
-            if node.id == entity_id and (entity_type == "Node" or entity_type is None):
-                return node
-            for actor in node.actors:
-                if actor.id == entity_id and (entity_type == "Actor" or entity_type is None):
-                    return actor
-                for resource in actor.resources:
-                    if resource.id == entity_id and (entity_type == "Resource" or entity_type is None):
-                        return resource
-            for resource in node.resources:
-                if resource.id == entity_id and (entity_type == "Resource" or entity_type is None):
-                    return resource
-            for mine in node.mines:
-                if mine.id == entity_id and (entity_type == "Mine" or entity_type is None):
-                    return mine
-            for site in node.sites:
-                if site.id == entity_id and (entity_type == "Site" or entity_type is None):
-                    return site
-            for building in node.buildings:
-                if building.id == entity_id and (entity_type == "Building" or entity_type is None):
-                    return building
-            for edge in node.edges:
-                if edge.id == entity_id and (entity_type == "Edge" or entity_type is None):
-                    return edge
-            for task in node.tasks:
-                if task.id == entity_id and (entity_type == "Task" or entity_type is None):
-                    return task
-        return None
+            entity = self.entities_by_type.get(entity_type, {}).get(entity_id)
+        if entity is None or target_node is None or isinstance(entity, Command):
+            return entity
+        return entity if self.is_at_node(entity, target_node) else None
+
+    def is_at_node(self, entity, node):
+        """
+        Checks if an entity can be found at a node, either directly or (for resources) in the inventory of an actor that
+        is at the node. Edges are at both of the nodes they connect.
+
+        :param entity: the entity to be checked
+        :param node: the node the entity should be at
+        :return: True if the entity is at the node and False otherwise
+        """
+        if isinstance(entity, Node):
+            return entity is node
+        if isinstance(entity, Actor):
+            return node.actors.__contains__(entity)
+        if isinstance(entity, Resource):
+            return node.resources.__contains__(entity) or node.actors.__contains__(entity.location)
+        if isinstance(entity, Mine):
+            return node.mines.__contains__(entity)
+        if isinstance(entity, Site):
+            return node.sites.__contains__(entity)
+        if isinstance(entity, Building):
+            return node.buildings.__contains__(entity)
+        if isinstance(entity, Edge):
+            return node.edges.__contains__(entity)
+        if isinstance(entity, Task):
+            return node.tasks.__contains__(entity)
+        return False
 
     def get_field(self, entity_id, field, target_actors=None, entity_type=None, target_node=None):
         entity = self.get_by_id(entity_id, target_actors=target_actors, entity_type=entity_type, target_node=target_node)
         return None if entity is None else entity.fields.get(field)
+
+    def get_shortest_paths(self):
+        """
+        :return: A dictionary of the index of each node ID in the tables, the node ID at each index, an array of the
+        distances between each pair of nodes (inf if there is no path) and an array of the index of the next node on the
+        path (-1 if there is no path), as calculated by find_shortest_paths when the world was created
+        """
+        return self.shortest_paths
+
+    def find_shortest_paths(self):
+        """
+        Calculates the shortest distance and the next node on the shortest path between every pair of nodes, using
+        Dijkstra's algorithm from each node over the edges of that node. The graph does not change once the world is
+        created, so this is only done once.
+
+        :return: The tables given by get_shortest_paths
+        """
+        node_indices = {node.id: index for index, node in enumerate(self.nodes)}
+        num_of_nodes = self.nodes.__len__()
+        neighbours = [[] for _ in range(num_of_nodes)]
+        for edge in self.edges:
+            index_a = node_indices[edge.node_a.id]
+            index_b = node_indices[edge.node_b.id]
+            neighbours[index_a].append((index_b, edge.length()))
+            neighbours[index_b].append((index_a, edge.length()))
+
+        distances = np.full((num_of_nodes, num_of_nodes), np.inf)
+        # The row of each source holds the node before each node on the shortest path from the source. Edges go both
+        # ways, so the column of each node is the next node on the shortest path from every node to that node
+        previous_nodes = np.full((num_of_nodes, num_of_nodes), -1, dtype=np.int32)
+        for source in range(num_of_nodes):
+            source_distances = [m.inf] * num_of_nodes
+            source_previous_nodes = [-1] * num_of_nodes
+            source_distances[source] = 0
+            source_previous_nodes[source] = source
+            frontier = [(0, source)]
+            while frontier:
+                distance, index = heapq.heappop(frontier)
+                if distance > source_distances[index]:
+                    continue
+                for neighbour, length in neighbours[index]:
+                    new_distance = distance + length
+                    if new_distance < source_distances[neighbour]:
+                        source_distances[neighbour] = new_distance
+                        source_previous_nodes[neighbour] = index
+                        heapq.heappush(frontier, (new_distance, neighbour))
+            distances[source] = source_distances
+            previous_nodes[source] = source_previous_nodes
+        return {"node_indices": node_indices, "node_ids": [node.id for node in self.nodes], "distances": distances,
+                "next_hops": np.ascontiguousarray(previous_nodes.T)}
+
+    def get_distance(self, start_node_id, end_node_id):
+        """
+        :param start_node_id: the ID of the node the path starts at
+        :param end_node_id: the ID of the node the path ends at
+        :return: The length of the shortest path between the nodes, inf if there is no path, or None if either node does
+        not exist
+        """
+        return World.find_distance(self.get_shortest_paths(), start_node_id, end_node_id)
+
+    def get_path(self, start_node_id, end_node_id):
+        """
+        :param start_node_id: the ID of the node the path starts at
+        :param end_node_id: the ID of the node the path ends at
+        :return: A list of the ID's of the nodes on the shortest path, including the start and end nodes, or an empty
+        list if there is no path or either node does not exist
+        """
+        return World.find_path(self.get_shortest_paths(), start_node_id, end_node_id)
+
+    @staticmethod
+    def find_distance(shortest_paths, start_node_id, end_node_id):
+        """
+        :param shortest_paths: the shortest paths between every pair of nodes, as given by get_shortest_paths
+        :param start_node_id: the ID of the node the path starts at
+        :param end_node_id: the ID of the node the path ends at
+        :return: The length of the shortest path between the nodes, inf if there is no path, or None if either node does
+        not exist
+        """
+        node_indices = shortest_paths["node_indices"]
+        if not node_indices.__contains__(start_node_id) or not node_indices.__contains__(end_node_id):
+            return None
+        return float(shortest_paths["distances"][node_indices[start_node_id], node_indices[end_node_id]])
+
+    @staticmethod
+    def find_path(shortest_paths, start_node_id, end_node_id):
+        """
+        :param shortest_paths: the shortest paths between every pair of nodes, as given by get_shortest_paths
+        :param start_node_id: the ID of the node the path starts at
+        :param end_node_id: the ID of the node the path ends at
+        :return: A list of the ID's of the nodes on the shortest path, including the start and end nodes, or an empty
+        list if there is no path or either node does not exist
+        """
+        node_indices = shortest_paths["node_indices"]
+        if not node_indices.__contains__(start_node_id) or not node_indices.__contains__(end_node_id):
+            return []
+        node_ids = shortest_paths["node_ids"]
+        next_hops = shortest_paths["next_hops"]
+        current = node_indices[start_node_id]
+        end = node_indices[end_node_id]
+        if next_hops[current, end] == -1:
+            return []
+        path = [node_ids[current]]
+        while current != end:
+            current = next_hops[current, end]
+            path.append(node_ids[current])
+        return path
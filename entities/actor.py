@@ -1,6 +1,3 @@
-import random as r
-import numpy.random as nr
-
 from entities.building import Building
 
 
@@ -56,7 +53,7 @@ class Actor:
             return False
         node_index = self.node.shares_edge_with(target_node)
         if node_index != -1:
-            self.deviation = nr.normal(self.world.modifiers["ACTOR_MOVE_SPEED"],
+            self.deviation = self.world.np_random.normal(self.world.modifiers["ACTOR_MOVE_SPEED"],
                                        self.world.modifiers["TRAVEL_OVERALL_SD"]) \
                 if self.world.rules["TRAVEL_TU"] else 0
             self.set_target((self.node.edges[node_index], target_node))
@@ -70,7 +67,7 @@ class Actor:
         Tells the actor to begin travelling towards a random node that shares an edge with the node it is currently in
         :return: True if successful and False otherwise
         """
-        target_edge = self.node.edges[r.randint(0, self.node.edges.__len__() - 1)]
+        target_edge = self.node.edges[self.world.random.randint(0, self.node.edges.__len__() - 1)]
         if target_edge.node_a == self.node:
             return self.travel_to(target_edge.node_b)
         else:
@@ -86,9 +83,9 @@ class Actor:
             move_speed = self.world.modifiers["ACTOR_MOVE_SPEED"] if not self.world.rules["TRAVEL_TU"] else \
                 max(self.world.modifiers["TRAVEL_MIN_SD"],
                     min(self.world.modifiers["TRAVEL_MAX_SD"],
-                        nr.normal(self.deviation, self.world.modifiers["TRAVEL_PT_SD"])))
+                        self.world.np_random.normal(self.deviation, self.world.modifiers["TRAVEL_PT_SD"])))
 
-            if self.state == Actor.MOVING and self.world.rules["TRAVEL_NON_DETERMINISTIC"] and r.random() < \
+            if self.state == Actor.MOVING and self.world.rules["TRAVEL_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["TRAVEL_FAIL_CHANCE"]:
                 print("Travel failed")
                 self.cancel_action()
@@ -136,7 +133,7 @@ class Actor:
                     self.world.building_modifiers[Building.BUILDING_INVENTORY]:
                 print("Inventory full, cannot pick up other resources until something is dropped")
                 return False
-            if self.world.rules["PICK_UP_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["PICK_UP_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["PICK_UP_FAIL_CHANCE"]:
                 print("Pick up failed")
                 self.world.failures += 1
@@ -156,7 +153,7 @@ class Actor:
         :return: True if successful and False otherwise
         """
         if self.state == Actor.IDLE and self.resources.__contains__(resource):
-            if self.world.rules["DROP_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["DROP_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["DROP_FAIL_CHANCE"]:
                 print("Drop failed")
                 self.world.failures += 1
@@ -204,7 +201,7 @@ class Actor:
         :return True if successful and False otherwise
         """
         if self.state == Actor.IDLE:
-            if self.world.rules["SITE_CREATION_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["SITE_CREATION_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["SITE_CREATION_FAIL_CHANCE"]:
                 print("Site Creation failed")
                 self.world.failures += 1
@@ -225,7 +222,7 @@ class Actor:
         """
         if self.state == Actor.IDLE and self.node == site.node:
 
-            self.deviation = nr.normal(self.world.modifiers["BUILD_SPEED"],
+            self.deviation = self.world.np_random.normal(self.world.modifiers["BUILD_SPEED"],
                                        self.world.modifiers["CONSTRUCTING_OVERALL_SD"]) \
                 if self.world.rules["CONSTRUCTING_TU"] else 0
 
@@ -247,7 +244,7 @@ class Actor:
         if self.resources.__contains__(resource) \
                 and (self.node.sites.__contains__(site) or self.node.buildings.__contains__(site)) \
                 and self.state == Actor.IDLE:
-            if self.world.rules["DEPOSIT_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["DEPOSIT_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["DEPOSIT_FAIL_CHANCE"]:
                 print("Deposit failed")
                 self.world.failures += 1
@@ -336,6 +333,7 @@ class Actor:
         """
         self.node = node
         self.fields.__setitem__("node", node.id)
+        self.world.mark_changed(self)
     
     def set_state(self, state):
         """
@@ -345,6 +343,8 @@ class Actor:
         """
         self.state = state
         self.fields.__setitem__("state", state)
+        self.world.mark_changed(self)
+        self.world.set_actor_active(self, state != Actor.IDLE)
     
     def set_progress(self, progress):
         """
@@ -354,6 +354,7 @@ class Actor:
         """
         self.progress = progress
         self.fields.__setitem__("progress", progress)
+        self.world.mark_changed(self)
     
     def set_target(self, target):
         """
@@ -369,6 +370,7 @@ class Actor:
                 self.fields.__setitem__("target", target.id)
             except AttributeError:
                 self.fields.__setitem__("target", target)
+        self.world.mark_changed(self)
     
     def append_resource(self, resource):
         """
@@ -378,6 +380,7 @@ class Actor:
         """
         self.resources.append(resource)
         self.fields.get("resources").append(resource.id)
+        self.world.mark_changed(self)
         
     def remove_resource(self, resource):
         """
@@ -387,3 +390,4 @@ class Actor:
         """
         self.resources.remove(resource)
         self.fields.get("resources").remove(resource.id)
+        self.world.mark_changed(self)
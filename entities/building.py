@@ -1,5 +1,3 @@
-import numpy.random as nr
-import random as r
 import math as m
 
 
@@ -73,7 +71,9 @@ class Building:
                     resource.set_used(True)
                     self.deposited_resources[resource.colour] += 1
                     self.fields.__setitem__("deposited_resources", self.deposited_resources)
+                    self.world.mark_changed(self)
                     resource.location.remove_resource(resource)
+                    self.world.unregister_entity(resource)
                     resource.set_used(True)
                     return True
         return False
@@ -84,7 +84,7 @@ class Building:
         on how many resources have been deposited so far.
         """
 
-        if self.world.rules["CONSTRUCTION_NON_DETERMINISTIC"] and r.random() < self.world.modifiers["CONSTRUCTION_FAIL_CHANCE"]:
+        if self.world.rules["CONSTRUCTION_NON_DETERMINISTIC"] and self.world.random.random() < self.world.modifiers["CONSTRUCTION_FAIL_CHANCE"]:
             print("Constructing failed")
             self.world.failures += 1
             self.fail_construction()
@@ -95,7 +95,7 @@ class Building:
             build_speed = self.world.modifiers["BUILD_SPEED"] if not self.world.rules["CONSTRUCTING_TU"] else \
                 max(self.world.modifiers["CONSTRUCTING_MIN_SD"],
                     min(self.world.modifiers["CONSTRUCTING_MAX_SD"],
-                        nr.normal(deviation, self.world.modifiers["CONSTRUCTING_PT_SD"])))
+                        self.world.np_random.normal(deviation, self.world.modifiers["CONSTRUCTING_PT_SD"])))
 
             building_progress = build_speed * ((1 + self.world.modifiers["ORANGE_BUILDING_MODIFIER_STRENGTH"]) **
                                                self.world.building_modifiers[Building.BUILDING_CONSTRUCTION])
@@ -108,7 +108,7 @@ class Building:
                     if actor.target == self:
                         actor.go_idle()
             if self.progress >= self.world.modifiers["BUILD_EFFORT"] * sum(self.needed_resources):
-                if self.world.rules["CONSTRUCTION_COMPLETION_NON_DETERMINISTIC"] and r.random() < \
+                if self.world.rules["CONSTRUCTION_COMPLETION_NON_DETERMINISTIC"] and self.world.random.random() < \
                         self.world.modifiers["CONSTRUCTION_COMPLETION_FAIL_CHANCE"]:
                     print("Construction completion failed")
                     self.world.failures += 1
@@ -119,7 +119,7 @@ class Building:
 
     def fail_construction(self):
         self.ignore_me()
-        penalty = r.uniform(self.world.modifiers["CONSTRUCTION_FAIL_MIN_PENALTY"],
+        penalty = self.world.random.uniform(self.world.modifiers["CONSTRUCTION_FAIL_MIN_PENALTY"],
                             self.world.modifiers["CONSTRUCTION_FAIL_MAX_PENALTY"])
         for _ in range(min(self.world.modifiers["MAX_RESOURCE_PENALTY"], m.ceil(sum(self.needed_resources) * penalty))):
             self.deposited_resources[self.deposited_resources.index(max(self.deposited_resources))] -= 1
@@ -157,3 +157,4 @@ class Building:
         if self.building_type == Building.BUILDING_ACTOR_SPAWN:
             self.progress = progress
             self.fields.__setitem__("progress", progress)
+            self.world.mark_changed(self)
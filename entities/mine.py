@@ -1,6 +1,3 @@
-import numpy.random as nr
-import random as r
-
 from entities.building import Building
 
 
@@ -43,7 +40,7 @@ class Mine:
         :return: True if digging can begin and false otherwise.
         """
 
-        if self.world.rules["DIGGING_NON_DETERMINISTIC"] and r.random() < \
+        if self.world.rules["DIGGING_NON_DETERMINISTIC"] and self.world.random.random() < \
                 self.world.modifiers["DIGGING_FAIL_CHANCE"]:
             print("Digging failed")
             self.world.failures += 1
@@ -54,7 +51,7 @@ class Mine:
         dig_speed = self.world.modifiers["DIG_SPEED"] if not self.world.rules["DIGGING_TU"] else \
             max(self.world.modifiers["DIGGING_MIN_SD"],
                 min(self.world.modifiers["DIGGING_MAX_SD"],
-                    nr.normal(deviation, self.world.modifiers["DIGGING_PT_SD"])))
+                    self.world.np_random.normal(deviation, self.world.modifiers["DIGGING_PT_SD"])))
 
         digging_progress = dig_speed * ((1 + self.world.modifiers["BLUE_BUILDING_MODIFIER_STRENGTH"]) **
                                         self.world.building_modifiers[Building.BUILDING_MINE])
@@ -93,7 +90,7 @@ class Mine:
 
         # Check if mining yields resources, and stop mining
         if self.progress >= self.world.modifiers["MINE_EFFORT"]:
-            if self.world.rules["DIGGING_COMPLETION_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["DIGGING_COMPLETION_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["DIGGING_COMPLETION_FAIL_CHANCE"]:
                 print("Digging completion failed")
                 self.set_progress(0)
@@ -118,3 +115,4 @@ class Mine:
         """
         self.progress = progress
         self.fields.__setitem__("progress", progress)
+        self.world.mark_changed(self)
@@ -64,6 +64,7 @@ class Node:
         """
         self.edges.append(edge)
         self.fields.get("edges").append(edge.id)
+        self.world.mark_changed(self)
 
     def append_actor(self, actor):
         """
@@ -72,6 +73,7 @@ class Node:
         """
         self.actors.append(actor)
         self.fields.get("actors").append(actor.id)
+        self.world.mark_changed(self)
 
     def remove_actor(self, actor):
         """
@@ -80,6 +82,7 @@ class Node:
         """
         self.actors.remove(actor)
         self.fields.get("actors").remove(actor.id)
+        self.world.mark_changed(self)
 
     def append_resource(self, resource):
         """
@@ -88,6 +91,7 @@ class Node:
         """
         self.resources.append(resource)
         self.fields.get("resources").append(resource.id)
+        self.world.mark_changed(self)
 
     def remove_resource(self, resource):
         """
@@ -96,6 +100,7 @@ class Node:
         """
         self.resources.remove(resource)
         self.fields.get("resources").remove(resource.id)
+        self.world.mark_changed(self)
 
     def append_mine(self, mine):
         """
@@ -104,6 +109,7 @@ class Node:
         """
         self.mines.append(mine)
         self.fields.get("mines").append(mine.id)
+        self.world.mark_changed(self)
 
     def append_site(self, site):
         """
@@ -112,6 +118,7 @@ class Node:
         """
         self.sites.append(site)
         self.fields.get("sites").append(site.id)
+        self.world.mark_changed(self)
 
     def remove_site(self, site):
         """
@@ -120,6 +127,7 @@ class Node:
         """
         self.sites.remove(site)
         self.fields.get("sites").remove(site.id)
+        self.world.mark_changed(self)
 
     def append_building(self, building):
         """
@@ -128,6 +136,7 @@ class Node:
         """
         self.buildings.append(building)
         self.fields.get("buildings").append(building.id)
+        self.world.mark_changed(self)
 
     def append_task(self, task):
         """
@@ -136,3 +145,4 @@ class Node:
         """
         self.tasks.append(task)
         self.fields.get("tasks").append(task.id)
+        self.world.mark_changed(self)
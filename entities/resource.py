@@ -43,6 +43,7 @@ class Resource:
             self.set_used(True)
             self.location.remove_resource(self)
             self.world.resources.remove(self)
+            self.world.unregister_entity(self)
 
     def set_location(self, location):
         """
@@ -52,6 +53,7 @@ class Resource:
         """
         self.location = location
         self.fields.__setitem__("location", location.id)
+        self.world.mark_changed(self)
 
     def set_used(self, used):
         """
@@ -61,3 +63,4 @@ class Resource:
         """
         self.used = used
         self.fields.__setitem__("used", used)
+        self.world.mark_changed(self)
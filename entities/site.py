@@ -1,5 +1,3 @@
-import numpy.random as nr
-import random as r
 import math as m
 
 from entities.building import Building
@@ -73,8 +71,10 @@ class Site:
                 resource.set_used(True)
                 self.deposited_resources[resource.colour] += 1
                 self.fields.__setitem__("deposited_resources", self.deposited_resources)
+                self.world.mark_changed(self)
                 resource.location.remove_resource(resource)
                 self.world.resources.remove(resource)
+                self.world.unregister_entity(resource)
                 resource.set_used(True)
                 return True
         return False
@@ -85,7 +85,7 @@ class Site:
         on how many resources have been deposited so far.
         """
 
-        if self.world.rules["CONSTRUCTION_NON_DETERMINISTIC"] and r.random() < \
+        if self.world.rules["CONSTRUCTION_NON_DETERMINISTIC"] and self.world.random.random() < \
                 self.world.modifiers["CONSTRUCTION_FAIL_CHANCE"]:
             print("Constructing failed")
             self.world.failures += 1
@@ -95,7 +95,7 @@ class Site:
         build_speed = self.world.modifiers["BUILD_SPEED"] if not self.world.rules["CONSTRUCTING_TU"] else \
             max(self.world.modifiers["CONSTRUCTING_MIN_SD"],
                 min(self.world.modifiers["CONSTRUCTING_MAX_SD"],
-                    nr.normal(deviation, self.world.modifiers["CONSTRUCTING_PT_SD"])))
+                    self.world.np_random.normal(deviation, self.world.modifiers["CONSTRUCTING_PT_SD"])))
 
         building_progress = build_speed * ((1 + self.world.modifiers["ORANGE_BUILDING_MODIFIER_STRENGTH"]) **
                                            self.world.building_modifiers[Building.BUILDING_CONSTRUCTION])
@@ -104,7 +104,7 @@ class Site:
         self.set_progress(min(self.progress + building_progress, max_progress))
 
         if self.progress >= self.world.modifiers["BUILD_EFFORT"] * sum(self.needed_resources):
-            if self.world.rules["CONSTRUCTION_COMPLETION_NON_DETERMINISTIC"] and r.random() < \
+            if self.world.rules["CONSTRUCTION_COMPLETION_NON_DETERMINISTIC"] and self.world.random.random() < \
                     self.world.modifiers["CONSTRUCTION_COMPLETION_FAIL_CHANCE"]:
                 self.world.failures += 1
                 print("Construction completion failed")
@@ -113,6 +113,7 @@ class Site:
             new_building = self.world.add_building(self.node, self.building_type)
             self.node.remove_site(self)
             self.world.sites.remove(self)
+            self.world.unregister_entity(self)
             self.ignore_me()
             if self.building_type == Building.BUILDING_TASK:
                 self.task.set_project(new_building)
@@ -122,7 +123,7 @@ class Site:
 
     def fail_construction(self):
         self.ignore_me()
-        penalty = r.uniform(self.world.modifiers["CONSTRUCTION_FAIL_MIN_PENALTY"],
+        penalty = self.world.random.uniform(self.world.modifiers["CONSTRUCTION_FAIL_MIN_PENALTY"],
                             self.world.modifiers["CONSTRUCTION_FAIL_MAX_PENALTY"])
         for _ in range(min(self.world.modifiers["MAX_RESOURCE_PENALTY"], m.ceil(sum(self.needed_resources) * penalty))):
             self.deposited_resources[self.deposited_resources.index(max(self.deposited_resources))] -= 1
@@ -154,3 +155,4 @@ class Site:
         """
         self.progress = progress
         self.fields.__setitem__("progress", progress)
+        self.world.mark_changed(self)
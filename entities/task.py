@@ -1,4 +1,3 @@
-import random as r
 from entities.building import Building
 
 
@@ -15,7 +14,7 @@ class Task:
         generated resource requirements.
         :param world: the world which the task is associated with
         """
-        self.node = world.nodes[r.randint(0, world.nodes.__len__() - 1)]
+        self.node = world.nodes[world.random.randint(0, world.nodes.__len__() - 1)]
         self.world = world
         self.id = self.world.get_new_id()
         self.difficulty = self.__decide_difficulty()
@@ -75,7 +74,7 @@ class Task:
 
         :return: The difficulty of the Task
         """
-        result = r.randint(1, self.world.modifiers["EASY_TASK_WEIGHT"] + self.world.modifiers["MEDIUM_TASK_WEIGHT"] +
+        result = self.world.random.randint(1, self.world.modifiers["EASY_TASK_WEIGHT"] + self.world.modifiers["MEDIUM_TASK_WEIGHT"] +
                            self.world.modifiers["HARD_TASK_WEIGHT"])
         if result - self.world.modifiers["EASY_TASK_WEIGHT"] <= 0:
             return Task.EASY
@@ -92,12 +91,12 @@ class Task:
         :return: The number of different resource types to be used in the Task
         """
         if self.difficulty == Task.EASY:
-            return r.randint(self.world.modifiers["EASY_TASK_MIN_TYPES"], self.world.modifiers["EASY_TASK_MAX_TYPES"])
+            return self.world.random.randint(self.world.modifiers["EASY_TASK_MIN_TYPES"], self.world.modifiers["EASY_TASK_MAX_TYPES"])
         elif self.difficulty == Task.MEDIUM:
-            return r.randint(self.world.modifiers["MEDIUM_TASK_MIN_TYPES"], 
+            return self.world.random.randint(self.world.modifiers["MEDIUM_TASK_MIN_TYPES"], 
                              self.world.modifiers["MEDIUM_TASK_MAX_TYPES"])
         else:
-            return r.randint(self.world.modifiers["HARD_TASK_MIN_TYPES"], self.world.modifiers["HARD_TASK_MAX_TYPES"])
+            return self.world.random.randint(self.world.modifiers["HARD_TASK_MIN_TYPES"], self.world.modifiers["HARD_TASK_MAX_TYPES"])
 
     def __get_num_of_resources(self, num_of_types):
         """
@@ -110,7 +109,7 @@ class Task:
         available = [0, 1, 2, 3, 4]
         chosen = []
         for _ in range(num_of_types):
-            index = r.randint(0, available.__len__() - 1)
+            index = self.world.random.randint(0, available.__len__() - 1)
             chosen.append(available[index])
             available.remove(available[index])
             
@@ -126,7 +125,7 @@ class Task:
                 else:
                     min_res = self.world.modifiers["HARD_TASK_MIN_RESOURCES"]
                     max_res = self.world.modifiers["HARD_TASK_MAX_RESOURCES"]
-                needed_resources[index] = r.randint(min_res, max_res)
+                needed_resources[index] = self.world.random.randint(min_res, max_res)
         return needed_resources
 
     def set_project(self, project):
@@ -138,9 +137,10 @@ class Task:
         """
         self.project = project
         self.fields.__setitem__("project", project.id)
+        self.world.mark_changed(self)
 
     def __set_dead_line(self):
-        if r.random() < self.world.rules["TASK_DEADLINE_PROBABILITY"]:
+        if self.world.random.random() < self.world.rules["TASK_DEADLINE_PROBABILITY"]:
             sum_of_res = sum(self.needed_resources) * self.world.modifiers["RESOURCE_COMP_MODIFIER"]
             mining_compensation = sum_of_res * self.world.modifiers["MINE_EFFORT"]
             travel_compensation = sum_of_res * self.world.world_gen_modifiers["CAST_DISTANCE"] * \
@@ -1,10 +1,14 @@
 import random
 import time
 import sys
+import os
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from craftbots import craft_bots
 from os.path import exists
 
+RULE_SETS = ["simple_small", "simple_large", "complex_small", "complex_large"]
+
 def get_seed(world_gen_path):
     return craft_bots.get_world_gen_modifiers(world_gen_path)["RANDOM_SEED"]
 
@@ -60,16 +64,95 @@ def run_evaluator(agents, epochs, modifiers_path, rules_path, world_gen_path, ru
         seed = int(time.time())
 
         for index, agent in enumerate(agents):
-            results[agent_names[index]].append(craft_bots.start_simulation(agent_class=agent,
-                                    use_gui=gui, # Set to False to allow for simulation to be run in the background
-                                    modifier_file=modifiers_path,
-                                    world_modifier_file=world_gen_path,
-                                    rule_file=rules_path,
-                                    seed = seed))
+            if gui:
+                results[agent_names[index]].append(craft_bots.start_simulation(agent_class=agent,
+                                        use_gui=gui,
+                                        modifier_file=modifiers_path,
+                                        world_modifier_file=world_gen_path,
+                                        rule_file=rules_path,
+                                        seed = seed))
+            else:
+                # Without a GUI the simulation can be run synchronously as fast as possible
+                results[agent_names[index]].append(craft_bots.run_headless(agent,
+                                        config={"modifier_file": modifiers_path,
+                                                "world_modifier_file": world_gen_path,
+                                                "rule_file": rules_path},
+                                        seed = seed))
             write_results(results[agent_names[index]][-1], rule_set_name, agent_names[index])
     return results
 
 
+def get_rule_set_paths(rule_set_name):
+    path = f"craftbots/initialisation_files/eval/{rule_set_name}"
+    return {"modifier_file": f"{path}/modifiers",
+            "world_modifier_file": f"{path}/world_gen_modifiers",
+            "rule_file": f"{path}/rules"}
+
+
+def get_available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_jobs(agent_names, epochs, rule_set_names, base_seed):
+    """
+    Shards an evaluation into one job for each agent, rule set and epoch. The seed of a job depends only on its epoch,
+    so every agent is evaluated on the same worlds and no seed is used twice for the same agent and rule set.
+
+    :param agent_names: the names of the agents being evaluated
+    :param epochs: the number of simulations to run for each agent in each rule set
+    :param rule_set_names: the names of the rule sets in craftbots/initialisation_files/eval
+    :param base_seed: the seed used for the first epoch
+    :return: A list of (agent name, rule set name, seed) tuples
+    """
+    return [(name, rule_set_name, base_seed + epoch)
+            for epoch in range(epochs)
+            for rule_set_name in rule_set_names
+            for name in agent_names]
+
+
+def run_parallel_evaluator(agents, epochs, rule_set_names, agent_names=None, base_seed=None, max_workers=None):
+    """
+    Runs an evaluation across a pool of processes. Each simulation is run headless in a worker, while the results are
+    collected and written by this process only, so the results files are never written to concurrently.
+
+    :param agents: the class constructors of the agents to be evaluated
+    :param epochs: the number of simulations to run for each agent in each rule set
+    :param rule_set_names: the names of the rule sets in craftbots/initialisation_files/eval to evaluate the agents in
+    :param agent_names: (optional) the names of the agents, used for the results files. Default: None (agents are
+    numbered)
+    :param base_seed: (optional) the seed of the first epoch, with each following epoch using the next seed. Default:
+    None (the current time is used)
+    :param max_workers: (optional) the number of processes to use. Default: None (every available core is used)
+    :return: A dictionary of the results for each rule set and agent, in order of seed
+    """
+    if agent_names is None or (isinstance(agent_names, list) and len(agents) != len(agent_names)):
+        agent_names = [i for i in range(len(agents))]
+    if base_seed is None: base_seed = int(time.time())
+    if max_workers is None: max_workers = get_available_cores()
+
+    agent_classes = dict(zip(agent_names, agents))
+    results = {rule_set_name: {name: [] for name in agent_names} for rule_set_name in rule_set_names}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(craft_bots.run_headless, agent_classes[name], get_rule_set_paths(rule_set_name),
+                                   seed): (name, rule_set_name)
+                   for name, rule_set_name, seed in get_jobs(agent_names, epochs, rule_set_names, base_seed)}
+
+        for future in as_completed(futures):
+            name, rule_set_name = futures[future]
+            result = future.result()
+            results[rule_set_name][name].append(result)
+            write_results(result, rule_set_name, name)
+
+    for rule_set_name in rule_set_names:
+        for name in agent_names:
+            results[rule_set_name][name].sort(key=lambda result: result["seed"])
+    return results
+
+
 def write_results(result, rule_set_name, agent):
     path = f"{rule_set_name}_{agent}_results.csv"
     if not exists(path):
@@ -128,8 +211,11 @@ def get_parameters():
         agent_names.append("TAA")
 
     rule_set_name = ""
+    rule_set_names = []
 
-    if "simple" in sys.argv:
+    if "ALL" in sys.argv:
+        rule_set_names = RULE_SETS
+    elif "simple" in sys.argv:
         rule_set_name += "simple" + "_"
         if "small" in sys.argv:
             rule_set_name += "small"
@@ -142,13 +228,19 @@ def get_parameters():
         elif "large" in sys.argv:
             rule_set_name += "large"
 
+    if rule_set_name: rule_set_names = [rule_set_name]
+
     gui = False
     if "GUI" in sys.argv:
         gui = True
 
+    parallel = False
+    if "PARALLEL" in sys.argv:
+        parallel = True
+
     try:
-        if agents and agent_names and rule_set_name:
-            return int(sys.argv[1]), agents, agent_names, rule_set_name, gui
+        if agents and agent_names and rule_set_names:
+            return int(sys.argv[1]), agents, agent_names, rule_set_names, gui, parallel
         else: return None
     except ValueError:
         return None
@@ -159,15 +251,20 @@ if __name__ == '__main__':
     parameters = get_parameters()
     if parameters is not None:
 
-        epochs, agents, agent_names, rule_set_name, gui = parameters
-
-        run_evaluator(agents, epochs,
-                                      f"craftbots/initialisation_files/eval/{rule_set_name}/modifiers",
-                                      f"craftbots/initialisation_files/eval/{rule_set_name}/rules",
-                                      f"craftbots/initialisation_files/eval/{rule_set_name}/world_gen_modifiers",
-                                      rule_set_name,
-                                      agent_names=agent_names,
-                                      gui=gui
-                                      )
+        epochs, agents, agent_names, rule_set_names, gui, parallel = parameters
+
+        if parallel:
+            run_parallel_evaluator(agents, epochs, rule_set_names, agent_names=agent_names)
+        else:
+            for rule_set_name in rule_set_names:
+                rule_set_paths = get_rule_set_paths(rule_set_name)
+                run_evaluator(agents, epochs,
+                              rule_set_paths["modifier_file"],
+                              rule_set_paths["rule_file"],
+                              rule_set_paths["world_modifier_file"],
+                              rule_set_name,
+                              agent_names=agent_names,
+                              gui=gui
+                              )
     else:
         print("Invalid parameters")
\ No newline at end of file
@@ -1,32 +1 @@
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple large &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA simple small &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex large &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small &
-python3 evaluator.py 25 TAA RBA complex small
+python3 evaluator.py 200 TAA RBA ALL PARALLEL